@@ -0,0 +1,447 @@
+"""Load-test the GUI and status path of snapchat_automation.py without a browser
+
+Runs the real SnapchatAutomationApp window with stub sessions that send
+synthetic status messages and photo-count updates from one thread each, then
+reports how the window kept up:
+
+- status latency: time from a session thread calling the status callback to the
+  line being inserted into the status panel
+- dashboard latency: time from a photo count changing to the dashboard row showing it
+  (includes waiting for the next once-a-second refresh), and dashboard lag: the part of
+  it after the refresh tick that should have shown the change
+- lost / reordered / coalesced status lines (coalesced lines were superseded by
+  newer ones in the same batch and would have been trimmed from the panel anyway)
+- main-thread busy time spent in the app's periodic handlers, and how late a
+  10 ms heartbeat timer fired (a stalled window shows up here)
+- process memory growth over the run
+
+On Linux without a display, an Xvfb server is started automatically if
+installed, or run the script under xvfb-run.
+
+Examples:
+    xvfb-run -a python bench_gui_load.py --sessions 40 --rate 20 --duration 30
+    python bench_gui_load.py --sessions 60 --rate 50 --json results.json --max-p95-ms 250
+"""
+import argparse
+import bisect
+import json
+import math
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import queue
+
+HEARTBEAT_MS = 10
+MEMORY_SAMPLE_MS = 1000
+# Time given to the window to drain queued lines after the sessions stop
+DRAIN_SECONDS = 1.0
+
+
+def start_virtual_display():
+    """Start Xvfb when there is no display on Linux; returns the process or None"""
+    if not sys.platform.startswith('linux') or os.environ.get('DISPLAY'):
+        return None
+    if not shutil.which('Xvfb'):
+        sys.exit("No DISPLAY set and Xvfb is not installed - run under xvfb-run or install Xvfb")
+    for number in range(99, 120):
+        if os.path.exists(f'/tmp/.X11-unix/X{number}'):
+            continue
+        process = subprocess.Popen(['Xvfb', f':{number}', '-screen', '0', '1280x1024x24', '-nolisten', 'tcp'],
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = time.time() + 5
+        while time.time() < deadline and process.poll() is None:
+            if os.path.exists(f'/tmp/.X11-unix/X{number}'):
+                os.environ['DISPLAY'] = f':{number}'
+                return process
+            time.sleep(0.05)
+        process.terminate()
+    sys.exit("Could not start Xvfb")
+
+
+def rss_bytes():
+    """Resident set size of this process (Linux), or the peak RSS elsewhere"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        try:
+            import resource
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return peak if sys.platform == 'darwin' else peak * 1024
+        except ImportError:
+            return 0
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    if not values:
+        return None
+    index = max(0, min(len(values) - 1, math.ceil(fraction * len(values)) - 1))
+    return values[index]
+
+
+def latency_summary(seconds):
+    values = [s * 1000 for s in seconds]
+    return {
+        'count': len(values),
+        'p50_ms': percentile(values, 0.5),
+        'p95_ms': percentile(values, 0.95),
+        'p99_ms': percentile(values, 0.99),
+        'max_ms': max(values) if values else None,
+    }
+
+
+class Recorder:
+    """Send and delivery times of every synthetic message, shared by all threads"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sent = {}
+        self.dequeued = set()
+        self.displayed = set()
+        self.status_latencies = []
+        self.last_displayed = {}
+        self.reordered = 0
+        self.count_changes = {}
+        self.dashboard_latencies = []
+        self.dashboard_lags = []
+        self.refresh_ticks = []
+        self.shown_counts = {}
+
+    def message_sent(self, session_id, seq):
+        with self.lock:
+            self.sent[(session_id, seq)] = time.perf_counter()
+
+    def count_changed(self, session_id, count):
+        with self.lock:
+            self.count_changes.setdefault(session_id, {})[count] = time.perf_counter()
+
+    def line_dequeued(self, key):
+        with self.lock:
+            self.dequeued.add(key)
+
+    def line_displayed(self, key):
+        now = time.perf_counter()
+        with self.lock:
+            sent_at = self.sent.get(key)
+            if sent_at is None or key in self.displayed:
+                return
+            self.displayed.add(key)
+            self.status_latencies.append(now - sent_at)
+            session_id, seq = key
+            if seq < self.last_displayed.get(session_id, 0):
+                self.reordered += 1
+            self.last_displayed[session_id] = max(seq, self.last_displayed.get(session_id, 0))
+
+    def refresh_started(self):
+        with self.lock:
+            self.refresh_ticks.append(time.perf_counter())
+
+    def count_displayed(self, session_id, count):
+        now = time.perf_counter()
+        with self.lock:
+            if self.shown_counts.get(session_id) == count:
+                return
+            self.shown_counts[session_id] = count
+            changed_at = self.count_changes.get(session_id, {}).get(count)
+            if changed_at is None:
+                return
+            self.dashboard_latencies.append(now - changed_at)
+            # Lag behind the first scheduled refresh after the change; a change picked up by the
+            # refresh that was already running when it happened has no lag
+            index = bisect.bisect_left(self.refresh_ticks, changed_at)
+            due = self.refresh_ticks[index] if index < len(self.refresh_ticks) else now
+            self.dashboard_lags.append(max(0.0, now - due))
+
+
+def bench_key(line):
+    """(session_id, seq) of a synthetic status line, or None"""
+    marker = line.find('#bench ')
+    if marker < 0:
+        return None
+    try:
+        session_id, seq = line[marker + 7:].split()[:2]
+        return int(session_id), int(seq)
+    except ValueError:
+        return None
+
+
+class RecordingQueue(queue.Queue):
+    """Status queue that notes which synthetic lines the window picked up"""
+
+    def __init__(self, recorder):
+        super().__init__()
+        self.recorder = recorder
+
+    def get_nowait(self):
+        line = super().get_nowait()
+        key = bench_key(line)
+        if key:
+            self.recorder.line_dequeued(key)
+        return line
+
+
+def build_app_classes(app_module, options, recorder):
+    """Stub session and instrumented app classes bound to the imported app module"""
+    SessionState = app_module.SessionState
+
+    class StubSession(app_module.ChromeSession):
+        """Sends synthetic status and count updates at a fixed rate instead of driving a browser"""
+
+        def _run_automation(self, wait_for=None):
+            for state in (SessionState.LAUNCHING, SessionState.WAITING_LOGIN, SessionState.WARMUP,
+                          SessionState.STARTING, SessionState.RUNNING):
+                self.lifecycle.transition(state, 'bench')
+            interval = 1.0 / options.rate
+            next_send = time.perf_counter()
+            seq = 0
+            while self.is_running:
+                seq += 1
+                recorder.message_sent(self.session_id, seq)
+                self.status_callback(self.session_id, f"#bench {self.session_id} {seq} synthetic status line")
+                if seq % options.round_every == 0:
+                    success = seq % (options.round_every * 10) != 0
+                    self._record_round({'success': success, 'error': None if success else 'Step 5: synthetic failure',
+                                        'timings': {'total': 900}})
+                    if success:
+                        # Noted before the update so the dashboard can never show it first
+                        recorder.count_changed(self.session_id, self.sent_count + 1)
+                        self._update_sent_count(self.sent_count + 1)
+                next_send += interval
+                delay = next_send - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    # Fell behind (GIL contention); send the backlog without sleeping
+                    next_send = time.perf_counter()
+            self.lifecycle.transition(SessionState.STOPPED, 'bench finished')
+
+    class BenchApp(app_module.SnapchatAutomationApp):
+        """The real app with stub sessions and timing hooks on its Tk-thread handlers"""
+
+        def __init__(self, root):
+            self.busy_seconds = {}
+            super().__init__(root)
+            status_queue = RecordingQueue(recorder)
+            while not self.status_queue.empty():
+                status_queue.put(self.status_queue.get_nowait())
+            self.status_queue = status_queue
+            self.friends_list = ['bench']
+            # Not tied to the slider, so more sessions than the slider allows can be tested
+            self.session_var = app_module.tk.IntVar(value=options.sessions)
+            insert = self.status_text.insert
+
+            def recording_insert(index, chars, *args):
+                for line in chars.splitlines():
+                    key = bench_key(line)
+                    if key:
+                        recorder.line_displayed(key)
+                return insert(index, chars, *args)
+
+            self.status_text.insert = recording_insert
+
+        def _timed(self, name, method, *args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.busy_seconds[name] = self.busy_seconds.get(name, 0.0) + time.perf_counter() - started
+
+        def _create_session(self, session_id, user_data_dir):
+            return StubSession(session_id, user_data_dir, self.friends_list.copy(), self._update_status,
+                               self.start_time, self._log_event)
+
+        def _flush_status(self):
+            self._timed('flush_status', super()._flush_status)
+
+        def _process_control_queue(self):
+            self._timed('process_control_queue', super()._process_control_queue)
+
+        def _update_working_time(self):
+            self._timed('update_working_time', super()._update_working_time)
+
+        def _refresh_all_session_displays(self, reschedule=True):
+            if reschedule:
+                recorder.refresh_started()
+            self._timed('refresh_dashboard', super()._refresh_all_session_displays, reschedule)
+            for session_id, row in list(self.session_widgets.items()):
+                try:
+                    recorder.count_displayed(session_id, int(self.session_tree.set(row, 'photos')))
+                except (ValueError, app_module.tk.TclError):
+                    continue
+
+    return BenchApp
+
+
+def run(options):
+    xvfb = start_virtual_display()
+    workdir = tempfile.mkdtemp(prefix='snapchat_bench_')
+    # Keep the benchmark away from the real profiles, friends list and logs
+    os.chdir(workdir)
+    if not options.event_log:
+        os.environ['SNAPCHAT_EVENT_LOG'] = '0'
+    else:
+        os.environ['SNAPCHAT_EVENT_LOG_DIR'] = os.path.join(workdir, 'logs')
+    # Stub sessions have no browser processes to account for
+    os.environ['SNAPCHAT_PROCESS_SAMPLE_INTERVAL'] = '0'
+    for name in ('SNAPCHAT_SESSIONS_PER_PROCESS', 'SNAPCHAT_METRICS_PORT', 'SNAPCHAT_TRACE_FILE',
+                 'SNAPCHAT_PERF_SAMPLE_INTERVAL'):
+        os.environ.pop(name, None)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import snapchat_automation as app_module
+
+    recorder = Recorder()
+    BenchApp = build_app_classes(app_module, options, recorder)
+    root = app_module.tk.Tk()
+    app = BenchApp(root)
+
+    heartbeat = {'lags': [], 'expected': None}
+    memory = {'start': rss_bytes(), 'peak': 0, 'samples': []}
+    timing = {}
+
+    def beat():
+        now = time.perf_counter()
+        if heartbeat['expected'] is not None:
+            heartbeat['lags'].append(max(0.0, now - heartbeat['expected']))
+        heartbeat['expected'] = now + HEARTBEAT_MS / 1000.0
+        root.after(HEARTBEAT_MS, beat)
+
+    def sample_memory():
+        value = rss_bytes()
+        memory['samples'].append(value)
+        memory['peak'] = max(memory['peak'], value)
+        root.after(MEMORY_SAMPLE_MS, sample_memory)
+
+    def launch():
+        app.busy_seconds.clear()
+        timing['started'] = time.perf_counter()
+        app._launch_sessions()
+        root.after(int(options.duration * 1000), stop)
+
+    def stop():
+        timing['stopped'] = time.perf_counter()
+        app._stop_all_sessions()
+        root.after(int(DRAIN_SECONDS * 1000), finish)
+
+    def finish():
+        timing['finished'] = time.perf_counter()
+        timing['text_lines'] = int(app.status_text.index('end-1c').split('.')[0])
+        app._on_close()
+
+    root.after(0, beat)
+    root.after(0, sample_memory)
+    root.after(200, launch)
+    root.mainloop()
+    if xvfb:
+        xvfb.terminate()
+    shutil.rmtree(workdir, ignore_errors=True)
+    return report(options, recorder, app.busy_seconds, heartbeat['lags'], memory, timing)
+
+
+def report(options, recorder, busy_seconds, lags, memory, timing):
+    wall = timing['finished'] - timing['started']
+    sent = len(recorder.sent)
+    lost = sent - len(recorder.dequeued)
+    busy = sum(busy_seconds.values())
+    return {
+        'config': {
+            'sessions': options.sessions,
+            'rate_per_session': options.rate,
+            'duration_s': options.duration,
+            'round_every': options.round_every,
+            'event_log': options.event_log,
+        },
+        'messages': {
+            'sent': sent,
+            'sent_per_second': sent / (timing['stopped'] - timing['started']),
+            'displayed': len(recorder.displayed),
+            'coalesced': len(recorder.dequeued) - len(recorder.displayed),
+            'lost': lost,
+            'reordered': recorder.reordered,
+            'status_panel_lines': timing['text_lines'],
+        },
+        'status_latency': latency_summary(recorder.status_latencies),
+        'dashboard_latency': latency_summary(recorder.dashboard_latencies),
+        'dashboard_lag': latency_summary(recorder.dashboard_lags),
+        'main_thread': {
+            'busy_fraction': busy / wall if wall else None,
+            'busy_ms_by_handler': {name: seconds * 1000 for name, seconds in sorted(busy_seconds.items())},
+            'heartbeat_lag': latency_summary(lags),
+        },
+        'memory': {
+            'start_mb': memory['start'] / 1e6,
+            'end_mb': (memory['samples'][-1] if memory['samples'] else 0) / 1e6,
+            'peak_mb': memory['peak'] / 1e6,
+            'growth_mb': ((memory['samples'][-1] if memory['samples'] else 0) - memory['start']) / 1e6,
+        },
+    }
+
+
+def format_ms(value):
+    return '-' if value is None else f"{value:.1f}"
+
+
+def print_report(result):
+    messages = result['messages']
+    print(f"Sessions: {result['config']['sessions']}  rate: {result['config']['rate_per_session']}/s each  "
+          f"duration: {result['config']['duration_s']}s")
+    print(f"Messages: {messages['sent']} sent ({messages['sent_per_second']:.0f}/s), {messages['displayed']} displayed, "
+          f"{messages['coalesced']} coalesced, {messages['lost']} lost, {messages['reordered']} reordered")
+    for name in ('status_latency', 'dashboard_latency', 'dashboard_lag'):
+        summary = result[name]
+        print(f"{name.replace('_', ' ').capitalize()}: p50 {format_ms(summary['p50_ms'])} ms  "
+              f"p95 {format_ms(summary['p95_ms'])} ms  p99 {format_ms(summary['p99_ms'])} ms  "
+              f"max {format_ms(summary['max_ms'])} ms  (n={summary['count']})")
+    main_thread = result['main_thread']
+    handlers = ', '.join(f"{name} {ms:.0f} ms" for name, ms in main_thread['busy_ms_by_handler'].items())
+    print(f"Main thread busy: {main_thread['busy_fraction'] * 100:.1f}% ({handlers})")
+    lag = main_thread['heartbeat_lag']
+    print(f"Heartbeat lag: p95 {format_ms(lag['p95_ms'])} ms  max {format_ms(lag['max_ms'])} ms")
+    memory = result['memory']
+    print(f"Memory: {memory['start_mb']:.1f} MB -> {memory['end_mb']:.1f} MB "
+          f"(peak {memory['peak_mb']:.1f} MB, growth {memory['growth_mb']:+.1f} MB)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sessions', type=int, default=20, help='number of stub sessions (default 20)')
+    parser.add_argument('--rate', type=float, default=10.0, help='status messages per second per session (default 10)')
+    parser.add_argument('--duration', type=float, default=15.0, help='seconds to send for (default 15)')
+    parser.add_argument('--round-every', type=int, default=5,
+                        help='record a round (and a photo count update) every N messages (default 5)')
+    parser.add_argument('--event-log', action='store_true', help='also write the event log (to a temporary folder)')
+    parser.add_argument('--json', help='write the results to this file as JSON')
+    parser.add_argument('--max-p95-ms', type=float,
+                        help='exit with status 1 if the status latency or dashboard lag p95 exceeds this')
+    parser.add_argument('--max-dashboard-p95-ms', type=float,
+                        help='exit with status 1 if the dashboard latency p95 (including the wait for the '
+                             'next refresh, about one refresh interval) exceeds this')
+    parser.add_argument('--max-lost', type=int, default=0, help='exit with status 1 if more lines are lost (default 0)')
+    args = parser.parse_args(argv)
+    if args.sessions < 1 or args.rate <= 0 or args.duration <= 0 or args.round_every < 1:
+        parser.error('--sessions, --rate, --duration and --round-every must be positive')
+
+    output = os.path.abspath(args.json) if args.json else None
+    result = run(args)
+    print_report(result)
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+
+    failed = result['messages']['lost'] > args.max_lost or result['messages']['reordered'] > 0
+    for names, limit in ((('status_latency', 'dashboard_lag'), args.max_p95_ms),
+                         (('dashboard_latency',), args.max_dashboard_p95_ms)):
+        if limit is None:
+            continue
+        for name in names:
+            p95 = result[name]['p95_ms']
+            failed = failed or (p95 is not None and p95 > limit)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
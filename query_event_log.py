@@ -0,0 +1,118 @@
+"""Filter the on-disk event log written by snapchat_automation.py
+
+Examples:
+    python query_event_log.py --session 3 --level error
+    python query_event_log.py --since 30m --grep "Step 5"
+    python query_event_log.py --since 2024-05-01T10:00 --until 2024-05-01T11:00 --json
+"""
+import argparse
+import glob
+import gzip
+import json
+import os
+import re
+import sys
+import time
+from datetime import datetime
+
+LEVELS = {'info': 0, 'warning': 1, 'error': 2}
+
+
+def parse_time(value):
+    """Accept an ISO timestamp or a relative age like 45s, 30m, 2h, 1d"""
+    match = re.match(r'^(\d+(?:\.\d+)?)([smhd])$', value)
+    if match:
+        amount, unit = match.groups()
+        seconds = float(amount) * {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}[unit]
+        return time.time() - seconds
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid time '{value}' (use ISO format or e.g. 30m, 2h)")
+
+
+def parse_pattern(value):
+    """Compile a case-insensitive regular expression for --grep"""
+    try:
+        return re.compile(value, re.IGNORECASE)
+    except re.error as e:
+        raise argparse.ArgumentTypeError(f"invalid regular expression '{value}': {e}")
+
+
+def log_files(directory, since=None, until=None):
+    """Event log files in chronological order, skipping days outside the time range"""
+    paths = glob.glob(os.path.join(directory, 'events_*.jsonl')) + glob.glob(os.path.join(directory, 'events_*.jsonl.gz'))
+    files = []
+    for path in paths:
+        match = re.match(r'^events_(\d{4}-\d{2}-\d{2})_(\d+)\.jsonl(\.gz)?$', os.path.basename(path))
+        if not match:
+            continue
+        day = match.group(1)
+        if since is not None and day < datetime.fromtimestamp(since).strftime('%Y-%m-%d'):
+            continue
+        if until is not None and day > datetime.fromtimestamp(until).strftime('%Y-%m-%d'):
+            continue
+        files.append((day, int(match.group(2)), path))
+    return [path for _, _, path in sorted(files)]
+
+
+def read_events(path):
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # A line cut short by a crash is not worth failing the query over
+                continue
+
+
+def query(directory, sessions=None, level=None, since=None, until=None, kinds=None, pattern=None):
+    min_level = LEVELS[level] if level else 0
+    regex = parse_pattern(pattern) if isinstance(pattern, str) else pattern
+    for path in log_files(directory, since, until):
+        for event in read_events(path):
+            if sessions and event.get('session') not in sessions:
+                continue
+            if LEVELS.get(event.get('level'), 0) < min_level:
+                continue
+            if since is not None and event.get('ts', 0) < since:
+                continue
+            if until is not None and event.get('ts', 0) > until:
+                continue
+            if kinds and event.get('kind') not in kinds:
+                continue
+            if regex and not regex.search(event.get('message', '')):
+                continue
+            yield event
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dir', default=os.environ.get('SNAPCHAT_EVENT_LOG_DIR', os.path.join(os.getcwd(), 'logs')),
+                        help='event log folder (default: ./logs or SNAPCHAT_EVENT_LOG_DIR)')
+    parser.add_argument('--session', type=int, action='append', help='session id (repeatable, 0 = app messages)')
+    parser.add_argument('--level', choices=sorted(LEVELS, key=LEVELS.get), help='minimum level')
+    parser.add_argument('--kind', action='append', help='event kind, e.g. status, round, round_result, recycle (repeatable)')
+    parser.add_argument('--since', type=parse_time, help='ISO time or age such as 30m')
+    parser.add_argument('--until', type=parse_time, help='ISO time or age such as 5m')
+    parser.add_argument('--grep', type=parse_pattern, help='regular expression matched against the message')
+    parser.add_argument('--json', action='store_true', help='print raw JSON lines')
+    args = parser.parse_args(argv)
+
+    count = 0
+    try:
+        for event in query(args.dir, args.session, args.level, args.since, args.until, args.kind, args.grep):
+            count += 1
+            if args.json:
+                print(json.dumps(event))
+            else:
+                print(f"{event.get('time', '')} [{event.get('level', ''):7}] S{event.get('session', 0):<3} {event.get('message', '')}")
+    except BrokenPipeError:
+        return 0
+    print(f"{count} event(s)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
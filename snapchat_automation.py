@@ -1,35 +1,1589 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
 import threading
+import queue
+import multiprocessing
 import os
+import sys
+import re
+import math
 import json
+import gzip
+import shutil
+import hashlib
+import tempfile
+from contextlib import contextmanager
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
 import time
 from datetime import datetime
 
+# Optional local HTTP metrics/control endpoint (disabled unless a port is set)
+METRICS_HOST = os.environ.get('SNAPCHAT_METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.environ.get('SNAPCHAT_METRICS_PORT', '0') or 0)
+
+# Session control actions accepted from the GUI and the HTTP endpoint
+SESSION_ACTIONS = ('stop', 'pause', 'resume', 'restart', 'recycle')
+# Per-session control buttons under the dashboard: (action, label, colour)
+SESSION_BUTTONS = (
+    ('pause', 'Pause', '#2196F3'),
+    ('resume', 'Resume', '#31a14b'),
+    ('stop', 'Stop', '#f44336'),
+    ('restart', 'Restart', '#ff9800'),
+)
+
+# Opt-in CDP performance sampling: seconds between samples (0 disables) and output directory
+PERF_SAMPLE_INTERVAL = float(os.environ.get('SNAPCHAT_PERF_SAMPLE_INTERVAL', '0') or 0)
+PERF_SAMPLE_DIR = os.environ.get('SNAPCHAT_PERF_SAMPLE_DIR', os.path.join(os.getcwd(), 'perf_samples'))
+# Report flagged trends to the status panel every this many samples
+PERF_SUMMARY_EVERY = 60
+
+# Scheduled page recycling (0 disables a trigger): rounds, JS heap size and wall-clock minutes
+RECYCLE_AFTER_ROUNDS = int(os.environ.get('SNAPCHAT_RECYCLE_ROUNDS', '0') or 0)
+RECYCLE_HEAP_MB = float(os.environ.get('SNAPCHAT_RECYCLE_HEAP_MB', '0') or 0)
+RECYCLE_INTERVAL_MINUTES = float(os.environ.get('SNAPCHAT_RECYCLE_MINUTES', '0') or 0)
+# The heap trigger waits this many rounds and seconds after a recycle, in case a fresh page is already over the limit
+RECYCLE_HEAP_MIN_ROUNDS = 20
+RECYCLE_HEAP_MIN_SECONDS = 300
+# Reload attempts per recycle, and failed recycles in a row before the monitor gives up on the page
+RECYCLE_RELOAD_ATTEMPTS = 2
+RECYCLE_RECOVERY_ATTEMPTS = 3
+
+# Per-session accounting of each browser's process tree from /proc (Linux only; 0 disables)
+PROCESS_SAMPLE_INTERVAL = float(os.environ.get('SNAPCHAT_PROCESS_SAMPLE_INTERVAL', '5') or 0)
+# Write each session's usage to the event log every this many samples
+PROCESS_LOG_EVERY = 12
+# Optional soft limits per process tree (0 disables): CPU % (100 = one core), memory (PSS, or RSS) and open fds
+PROCESS_LIMIT_CPU_PERCENT = float(os.environ.get('SNAPCHAT_PROCESS_LIMIT_CPU', '0') or 0)
+PROCESS_LIMIT_MEMORY_MB = float(os.environ.get('SNAPCHAT_PROCESS_LIMIT_MEMORY_MB', '0') or 0)
+PROCESS_LIMIT_FDS = int(os.environ.get('SNAPCHAT_PROCESS_LIMIT_FDS', '0') or 0)
+# What a session over a limit does: 'recycle' (reload the page) or 'restart' (relaunch the browser)
+PROCESS_LIMIT_ACTION = os.environ.get('SNAPCHAT_PROCESS_LIMIT_ACTION', 'recycle').strip().lower()
+# Consecutive samples over a limit before acting, and the minimum time between actions per session
+PROCESS_LIMIT_SAMPLES = 3
+PROCESS_LIMIT_COOLDOWN_SECONDS = 300
+
+# Request policy: comma-separated Playwright resource types (e.g. "font,media") and URL regexes to refuse
+BLOCK_RESOURCE_TYPES = [t.strip() for t in os.environ.get('SNAPCHAT_BLOCK_RESOURCE_TYPES', '').split(',') if t.strip()]
+# (commas inside {m,n} or [...] belong to the regex; the patterns are validated once, below NetworkPolicy's helpers)
+BLOCK_URL_PATTERNS_TEXT = os.environ.get('SNAPCHAT_BLOCK_URL_PATTERNS', '')
+
+# How often an idle session thread checks for commands and lets Playwright dispatch events
+COMMAND_POLL_SECONDS = 0.2
+
+# On-disk event log (set SNAPCHAT_EVENT_LOG=0 to disable); files split by day and by size
+EVENT_LOG_ENABLED = os.environ.get('SNAPCHAT_EVENT_LOG', '1') != '0'
+EVENT_LOG_DIR = os.environ.get('SNAPCHAT_EVENT_LOG_DIR', os.path.join(os.getcwd(), 'logs'))
+EVENT_LOG_MAX_MB = float(os.environ.get('SNAPCHAT_EVENT_LOG_MAX_MB', '10') or 10)
+EVENT_LOG_COMPRESS = os.environ.get('SNAPCHAT_EVENT_LOG_COMPRESS', '0') == '1'
+EVENT_LOG_QUEUE_SIZE = 10000
+
+# Run sessions in worker processes, this many sessions per process (0 keeps them all in this process)
+SESSIONS_PER_PROCESS = int(os.environ.get('SNAPCHAT_SESSIONS_PER_PROCESS', '0') or 0)
+# How often workers push session snapshots to the coordinator
+WORKER_SNAPSHOT_SECONDS = 1.0
+# How often the coordinator checks that worker processes are still alive
+WORKER_CHECK_SECONDS = 1.0
+# Time a worker gives all of its sessions together to close their browsers on shutdown
+WORKER_SHUTDOWN_SECONDS = 15
+
+# Synthetic camera: a .y4m/.mjpeg/.jpg file, or "1" for Chromium's built-in test pattern (empty uses the real webcam)
+FAKE_CAMERA = os.environ.get('SNAPCHAT_FAKE_CAMERA', '').strip()
+# Where .jpg camera images are converted to .mjpeg (falls back to the temp folder if not writable)
+FAKE_CAMERA_DIR = os.path.join(os.getcwd(), 'fake_camera')
+
+# Pipelined rounds: keep the capture view alive and start the next capture once a send is confirmed
+PIPELINE_ROUNDS = os.environ.get('SNAPCHAT_PIPELINE_ROUNDS', '0') == '1'
+
+# Record round/step/delay and Python-side spans and export them as Chrome Trace Event JSON to this file
+TRACE_FILE = os.environ.get('SNAPCHAT_TRACE_FILE', '').strip()
+TRACE_MAX_EVENTS = 200000
+
+# Upper bound of the session slider
+MAX_SESSIONS = 60
+# Dashboard rows are refreshed from one fleet snapshot at this interval
+DASHBOARD_REFRESH_MS = 1000
+# Queued status lines are written to the status panel at this interval
+STATUS_FLUSH_MS = 100
+STATUS_MAX_LINES = 30
+
+# Dashboard table columns: (key, heading, width, anchor)
+DASHBOARD_COLUMNS = (
+    ('session', 'Session', 60, 'center'),
+    ('state', 'State', 100, 'w'),
+    ('in_state', 'In state', 70, 'center'),
+    ('photos', 'Photos', 60, 'e'),
+    ('rounds', 'Rounds', 60, 'e'),
+    ('rate', 'Rounds/min', 75, 'e'),
+    ('success', 'Success', 60, 'e'),
+    ('errors', 'Errors', 55, 'e'),
+    ('cpu', 'CPU %', 55, 'e'),
+    ('memory', 'Mem MB', 65, 'e'),
+    ('fds', 'FDs', 45, 'e'),
+    ('last_error', 'Last error', 200, 'w'),
+)
+# Filter choices above the table
+DASHBOARD_FILTER_ALL = 'All sessions'
+DASHBOARD_FILTER_ERRORS = 'With errors'
+
+# Consecutive failed rounds (or monitor errors) before a running session counts as degraded
+DEGRADED_AFTER_FAILURES = 5
+
+
+def _percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class SessionStats:
+    """Thread-safe round counters and step latency samples for one session"""
+    STEPS = ('step1', 'step2', 'step3', 'step4', 'step5', 'step6', 'step7', 'confirm', 'total')
+    QUANTILES = (0.5, 0.9, 0.99)
+
+    def __init__(self, window=500):
+        self.lock = threading.Lock()
+        self.rounds = 0
+        self.successes = 0
+        self.failures = 0
+        self.exceptions = 0
+        self.time_saved_ms = 0
+        self.errors = {}
+        self.last_error = None
+        self.last_error_time = None
+        self.step_samples = {step: deque(maxlen=window) for step in self.STEPS}
+        self.round_end_times = deque(maxlen=window)
+
+    def record_round(self, result):
+        """Record a round result reported by the in-page script"""
+        result = result or {}
+        error = result.get('error')
+        with self.lock:
+            self.rounds += 1
+            if result.get('success'):
+                self.successes += 1
+            elif error and error.startswith('Exception'):
+                self.exceptions += 1
+            else:
+                self.failures += 1
+            if error:
+                self._record_error_locked(error)
+            timings = result.get('timings') or {}
+            for step, value in timings.items():
+                if step in self.step_samples and isinstance(value, (int, float)):
+                    self.step_samples[step].append(value)
+            if isinstance(timings.get('saved'), (int, float)):
+                self.time_saved_ms += timings['saved']
+            self.round_end_times.append(time.time())
+
+    def record_error(self, message):
+        """Record a Python-side error (monitor, injection, ...)"""
+        with self.lock:
+            self._record_error_locked(message)
+
+    def _record_error_locked(self, message):
+        # Group errors by their prefix, e.g. "Step 5" or "Monitor error"
+        kind = message.split(':', 1)[0].strip()[:40] or 'unknown'
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+        self.last_error = message
+        self.last_error_time = time.time()
+
+    def rounds_per_minute(self, window=60):
+        """Rounds completed in the last `window` seconds, scaled to one minute"""
+        with self.lock:
+            cutoff = time.time() - window
+            recent = sum(1 for t in self.round_end_times if t >= cutoff)
+        return recent * 60.0 / window
+
+    def snapshot(self):
+        """Return a JSON-serialisable copy of the counters"""
+        rate = self.rounds_per_minute()
+        with self.lock:
+            latencies = {}
+            for step, samples in self.step_samples.items():
+                ordered = sorted(samples)
+                latencies[step] = {str(q): _percentile(ordered, q) for q in self.QUANTILES}
+            return {
+                'rounds': self.rounds,
+                'successes': self.successes,
+                'failures': self.failures,
+                'exceptions': self.exceptions,
+                'time_saved_ms': self.time_saved_ms,
+                'rounds_per_minute': rate,
+                'errors': dict(self.errors),
+                'last_error': self.last_error,
+                'last_error_time': self.last_error_time,
+                'step_latency_ms': latencies,
+            }
+
+
+class SessionState:
+    """Lifecycle states of a ChromeSession"""
+    CREATED = 'created'
+    LAUNCHING = 'launching'
+    WAITING_LOGIN = 'waiting_login'
+    WARMUP = 'warmup'
+    STARTING = 'starting'
+    RUNNING = 'running'
+    PAUSED = 'paused'
+    DEGRADED = 'degraded'
+    RECYCLING = 'recycling'
+    STOPPING = 'stopping'
+    STOPPED = 'stopped'
+    DEAD = 'dead'
+
+    TERMINAL = (STOPPED, DEAD)
+    TRANSITIONS = {
+        CREATED: (LAUNCHING,),
+        LAUNCHING: (WAITING_LOGIN,),
+        WAITING_LOGIN: (WARMUP,),
+        WARMUP: (STARTING,),
+        STARTING: (RUNNING, PAUSED),
+        RUNNING: (PAUSED, DEGRADED, RECYCLING),
+        DEGRADED: (RUNNING, PAUSED, RECYCLING),
+        PAUSED: (RUNNING, RECYCLING),
+        RECYCLING: (RUNNING, PAUSED, DEGRADED),
+        STOPPING: (STOPPED, DEAD),
+    }
+
+
+# Session widget colours per lifecycle state
+STATE_COLORS = {
+    SessionState.CREATED: '#aaaaaa',
+    SessionState.LAUNCHING: '#aaaaaa',
+    SessionState.WAITING_LOGIN: '#ffb020',
+    SessionState.WARMUP: '#ffd54f',
+    SessionState.STARTING: '#ffd54f',
+    SessionState.RUNNING: '#31d158',
+    SessionState.PAUSED: '#2196F3',
+    SessionState.DEGRADED: '#ff9800',
+    SessionState.RECYCLING: '#b388ff',
+    SessionState.STOPPING: '#aaaaaa',
+    SessionState.STOPPED: '#777777',
+    SessionState.DEAD: '#ff5f57',
+}
+
+
+def _format_duration(seconds):
+    """Format seconds as MM:SS or HH:MM:SS"""
+    seconds = int(seconds or 0)
+    hours, minutes, secs = seconds // 3600, (seconds % 3600) // 60, seconds % 60
+    if hours > 0:
+        return f"{hours:02d}:{minutes:02d}:{secs:02d}"
+    return f"{minutes:02d}:{secs:02d}"
+
+
+class SessionLifecycle:
+    """Session state machine with timestamped transitions and derived timing metrics"""
+
+    def __init__(self, session_id, on_transition=None):
+        self.session_id = session_id
+        # on_transition(session_id, old_state, new_state, reason, timestamp)
+        self.on_transition = on_transition
+        self.lock = threading.Lock()
+        self.created_at = time.time()
+        self.state = SessionState.CREATED
+        self.entered_at = self.created_at
+        self.history = deque(maxlen=200)
+        self.time_in_state = {}
+        self.first_entered = {SessionState.CREATED: self.created_at}
+        self.first_send_at = None
+        self.running_rounds = 0
+        self.consecutive_failures = 0
+
+    def transition(self, new_state, reason=''):
+        """Move to `new_state`; returns False (and changes nothing) if the transition is not allowed"""
+        with self.lock:
+            old_state = self.state
+            if old_state == new_state or old_state in SessionState.TERMINAL:
+                return False
+            always_allowed = new_state in (SessionState.STOPPING, SessionState.STOPPED, SessionState.DEAD)
+            if not always_allowed and new_state not in SessionState.TRANSITIONS.get(old_state, ()):
+                return False
+            now = time.time()
+            self.time_in_state[old_state] = self.time_in_state.get(old_state, 0.0) + (now - self.entered_at)
+            self.state = new_state
+            self.entered_at = now
+            self.first_entered.setdefault(new_state, now)
+            self.history.append((now, old_state, new_state, reason))
+        if self.on_transition:
+            self.on_transition(self.session_id, old_state, new_state, reason, now)
+        return True
+
+    def record_round(self, success):
+        """Track round outcomes: first send, rounds while RUNNING, and degraded/recovered transitions"""
+        with self.lock:
+            state = self.state
+            if state == SessionState.RUNNING:
+                self.running_rounds += 1
+            if success:
+                self.consecutive_failures = 0
+                if self.first_send_at is None:
+                    self.first_send_at = time.time()
+            else:
+                self.consecutive_failures += 1
+            failures = self.consecutive_failures
+        if success and state == SessionState.DEGRADED:
+            self.transition(SessionState.RUNNING, 'round succeeded')
+        elif failures >= DEGRADED_AFTER_FAILURES and state == SessionState.RUNNING:
+            self.transition(SessionState.DEGRADED, f'{failures} consecutive failed rounds')
+
+    def seconds_in(self, state):
+        with self.lock:
+            total = self.time_in_state.get(state, 0.0)
+            if self.state == state:
+                total += time.time() - self.entered_at
+            return total
+
+    def snapshot(self):
+        running_seconds = self.seconds_in(SessionState.RUNNING)
+        degraded_seconds = self.seconds_in(SessionState.DEGRADED)
+        with self.lock:
+            login_started = self.first_entered.get(SessionState.WAITING_LOGIN)
+            logged_in = self.first_entered.get(SessionState.WARMUP)
+            return {
+                'state': self.state,
+                'state_since': self.entered_at,
+                'state_seconds': time.time() - self.entered_at,
+                'time_to_login': logged_in - login_started if login_started and logged_in else None,
+                'time_to_first_send': self.first_send_at - self.created_at if self.first_send_at else None,
+                'degraded_seconds': degraded_seconds,
+                'running_seconds': running_seconds,
+                'running_rounds_per_minute': self.running_rounds * 60.0 / running_seconds if running_seconds > 0 else None,
+                'transitions': [{'time': t, 'from': a, 'to': b, 'reason': r} for t, a, b, r in list(self.history)[-10:]],
+            }
+
+
+class PerfSampler:
+    """Periodically samples a page's Performance.getMetrics over CDP into a per-session time series"""
+    # Gauges: values that should stay flat on a healthy long run
+    GAUGES = ('JSHeapUsedSize', 'JSHeapTotalSize', 'Nodes', 'JSEventListeners', 'Documents')
+    # Cumulative counters: their per-second rate should stay flat
+    COUNTERS = ('LayoutCount', 'RecalcStyleCount', 'TaskDuration')
+    GAUGE_GROWTH_LIMIT = 0.2   # flag gauges growing more than 20% first quarter -> last quarter
+    RATE_GROWTH_LIMIT = 0.5    # flag counters whose rate grows more than 50% first half -> second half
+    MIN_SAMPLES = 8
+
+    def __init__(self, session_id, context, page, directory=None, interval=None):
+        self.session_id = session_id
+        self.context = context
+        self.page = page
+        self.directory = directory or PERF_SAMPLE_DIR
+        self.interval = interval or PERF_SAMPLE_INTERVAL
+        self.cdp = None
+        self.file = None
+        self.path = None
+        self.samples = deque(maxlen=5000)
+        self.latest = {}
+        self.sample_count = 0
+        self.next_sample_time = 0
+        self.lock = threading.Lock()
+
+    def start(self):
+        self.cdp = self.context.new_cdp_session(self.page)
+        self.cdp.send('Performance.enable')
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.path = os.path.join(self.directory, f'session_{self.session_id}_{stamp}.jsonl')
+        self.file = open(self.path, 'a', encoding='utf-8')
+        self.next_sample_time = time.time()
+
+    def sample_if_due(self):
+        if self.cdp is None or time.time() < self.next_sample_time:
+            return None
+        self.next_sample_time = time.time() + self.interval
+        return self.sample()
+
+    def sample(self):
+        """Take one sample; must run on the session thread"""
+        response = self.cdp.send('Performance.getMetrics')
+        values = {m['name']: m['value'] for m in response.get('metrics', [])
+                  if m['name'] in self.GAUGES or m['name'] in self.COUNTERS}
+        record = {'ts': time.time(), 'session': self.session_id}
+        record.update(values)
+        self.file.write(json.dumps(record) + '\n')
+        self.file.flush()
+        with self.lock:
+            self.samples.append(record)
+            self.latest = record
+            self.sample_count += 1
+        return record
+
+    def summary(self):
+        """Describe trends over the collected samples and flag suspicious growth"""
+        with self.lock:
+            samples = list(self.samples)
+        result = {'session': self.session_id, 'samples': len(samples), 'file': self.path,
+                  'metrics': {}, 'flags': []}
+        if len(samples) < self.MIN_SAMPLES:
+            return result
+        quarter = max(1, len(samples) // 4)
+        for name in self.GAUGES:
+            series = [s[name] for s in samples if name in s]
+            if len(series) < self.MIN_SAMPLES:
+                continue
+            start = sum(series[:quarter]) / quarter
+            end = sum(series[-quarter:]) / quarter
+            growth = (end - start) / start if start else 0.0
+            result['metrics'][name] = {'first': series[0], 'last': series[-1], 'max': max(series),
+                                       'growth': round(growth, 3)}
+            if growth > self.GAUGE_GROWTH_LIMIT:
+                result['flags'].append(f"{name} grew {growth * 100:.0f}% ({_format_metric(name, start)} -> {_format_metric(name, end)})")
+        half = len(samples) // 2
+        for name in self.COUNTERS:
+            first_rate = _counter_rate(samples[:half + 1], name)
+            second_rate = _counter_rate(samples[half:], name)
+            if first_rate is None or second_rate is None:
+                continue
+            growth = (second_rate - first_rate) / first_rate if first_rate else 0.0
+            result['metrics'][name] = {'rate_first_half': first_rate, 'rate_second_half': second_rate,
+                                       'growth': round(growth, 3)}
+            if growth > self.RATE_GROWTH_LIMIT:
+                result['flags'].append(f"{name} rate grew {growth * 100:.0f}% ({first_rate:.3g}/s -> {second_rate:.3g}/s)")
+        return result
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.latest)
+
+    def close(self):
+        """Write the trend summary next to the samples and release the CDP session"""
+        summary = self.summary()
+        if self.file:
+            try:
+                self.file.close()
+                with open(self.path[:-len('.jsonl')] + '_summary.json', 'w', encoding='utf-8') as f:
+                    json.dump(summary, f, indent=2)
+            except OSError:
+                pass
+            self.file = None
+        if self.cdp:
+            try:
+                self.cdp.detach()
+            except Exception:
+                pass
+            self.cdp = None
+        return summary
+
+
+def _counter_rate(samples, name):
+    """Per-second rate of a cumulative counter across a list of samples"""
+    points = [(s['ts'], s[name]) for s in samples if name in s]
+    if len(points) < 2 or points[-1][0] <= points[0][0]:
+        return None
+    return (points[-1][1] - points[0][1]) / (points[-1][0] - points[0][0])
+
+
+def _format_metric(name, value):
+    if name.startswith('JSHeap'):
+        return f"{value / (1024 * 1024):.1f} MB"
+    return f"{value:.0f}"
+
+
+class RecyclePolicy:
+    """Decides when a long-running page should be reloaded to shed accumulated DOM/heap"""
+
+    def __init__(self, max_rounds=None, max_heap_mb=None, interval_minutes=None):
+        self.max_rounds = RECYCLE_AFTER_ROUNDS if max_rounds is None else max_rounds
+        self.max_heap_mb = RECYCLE_HEAP_MB if max_heap_mb is None else max_heap_mb
+        self.interval_minutes = RECYCLE_INTERVAL_MINUTES if interval_minutes is None else interval_minutes
+
+    @property
+    def enabled(self):
+        return bool(self.max_rounds or self.max_heap_mb or self.interval_minutes)
+
+    def heap_check_due(self, rounds_since, seconds_since):
+        """Whether the heap trigger may fire yet (it needs enough rounds and time since the last recycle)"""
+        return bool(self.max_heap_mb) and rounds_since >= RECYCLE_HEAP_MIN_ROUNDS and seconds_since >= RECYCLE_HEAP_MIN_SECONDS
+
+    def over_heap_limit(self, heap_bytes):
+        return bool(self.max_heap_mb and heap_bytes and heap_bytes >= self.max_heap_mb * 1024 * 1024)
+
+    def reason(self, rounds_since, heap_bytes, seconds_since):
+        """Return why a recycle is due, or None"""
+        if self.max_rounds and rounds_since >= self.max_rounds:
+            return f"{rounds_since} rounds"
+        if self.heap_check_due(rounds_since, seconds_since) and self.over_heap_limit(heap_bytes):
+            return f"heap {heap_bytes / (1024 * 1024):.0f} MB"
+        if self.interval_minutes and seconds_since >= self.interval_minutes * 60:
+            return f"{seconds_since / 60:.0f} min"
+        return None
+
+
+class ProcessTreeSampler:
+    """CPU, memory and open file usage of each session's Chromium process tree, read from /proc (Linux)"""
+
+    def __init__(self):
+        self.clock_ticks = os.sysconf('SC_CLK_TCK')
+        self.page_size = os.sysconf('SC_PAGE_SIZE')
+        # pid -> (cpu ticks, start time) from the previous sample, for CPU % between samples
+        self.previous = {}
+        self.last_sample_time = None
+        # user data dir -> (root pid, start time)
+        self.roots = {}
+
+    @staticmethod
+    def available():
+        return sys.platform.startswith('linux') and os.path.isdir('/proc')
+
+    def sample(self, targets):
+        """Usage per session for `targets` ({session_id: user_data_dir}); sessions without a browser are left out"""
+        now = time.time()
+        processes = self._read_processes()
+        children = {}
+        for pid, (ppid, _, _) in processes.items():
+            children.setdefault(ppid, []).append(pid)
+        elapsed = now - self.last_sample_time if self.last_sample_time else None
+        self._find_roots(targets.values(), processes)
+
+        results = {}
+        for session_id, user_data_dir in targets.items():
+            root = self.roots.get(os.path.realpath(user_data_dir))
+            if root is None:
+                continue
+            tree = [root[0]]
+            for pid in tree:
+                tree.extend(children.get(pid, ()))
+            usage = self._tree_usage(tree, processes, elapsed)
+            usage['root_pid'] = root[0]
+            results[session_id] = usage
+        self.previous = {pid: (info[1], info[2]) for pid, info in processes.items()}
+        self.last_sample_time = now
+        return results
+
+    def _read_processes(self):
+        """pid -> (ppid, utime + stime ticks, start time) for every process"""
+        processes = {}
+        for name in os.listdir('/proc'):
+            if not name.isdigit():
+                continue
+            try:
+                with open(f'/proc/{name}/stat', 'rb') as f:
+                    stat = f.read().decode('utf-8', 'replace')
+            except OSError:
+                continue  # exited while scanning
+            # The command name is in parentheses and may contain spaces
+            fields = stat[stat.rfind(')') + 2:].split()
+            try:
+                processes[int(name)] = (int(fields[1]), int(fields[11]) + int(fields[12]), int(fields[19]))
+            except (IndexError, ValueError):
+                continue
+        return processes
+
+    def _find_roots(self, user_data_dirs, processes):
+        """Locate browser processes by their --user-data-dir flag; cached while the process lives"""
+        wanted = set()
+        for user_data_dir in user_data_dirs:
+            path = os.path.realpath(user_data_dir)
+            root = self.roots.get(path)
+            if root is None or processes.get(root[0], (None, None, None))[2] != root[1]:
+                self.roots.pop(path, None)
+                wanted.add(path)
+        if not wanted:
+            return
+        matches = {}
+        for pid in processes:
+            try:
+                with open(f'/proc/{pid}/cmdline', 'rb') as f:
+                    args = f.read().decode('utf-8', 'replace').split('\0')
+            except OSError:
+                continue
+            for arg in args:
+                if arg.startswith('--user-data-dir='):
+                    path = os.path.realpath(arg.split('=', 1)[1])
+                    if path in wanted:
+                        matches.setdefault(path, set()).add(pid)
+                    break
+        for path, pids in matches.items():
+            # The browser process is the one whose parent is not part of the same browser
+            roots = [pid for pid in pids if processes[pid][0] not in pids]
+            if roots:
+                root = min(roots, key=lambda pid: processes[pid][2])
+                self.roots[path] = (root, processes[root][2])
+
+    def _tree_usage(self, pids, processes, elapsed):
+        cpu_ticks = 0
+        rss = 0
+        pss = 0
+        pss_known = True
+        fds = 0
+        for pid in pids:
+            ticks, started = processes[pid][1], processes[pid][2]
+            previous = self.previous.get(pid)
+            # A process new since the last sample counts all of its CPU time
+            cpu_ticks += ticks - previous[0] if previous and previous[1] == started else ticks
+            try:
+                with open(f'/proc/{pid}/statm') as f:
+                    rss += int(f.read().split()[1]) * self.page_size
+            except (OSError, IndexError, ValueError):
+                continue
+            try:
+                with open(f'/proc/{pid}/smaps_rollup') as f:
+                    for line in f:
+                        if line.startswith('Pss:'):
+                            pss += int(line.split()[1]) * 1024
+                            break
+            except (OSError, IndexError, ValueError):
+                pss_known = False
+            try:
+                fds += len(os.listdir(f'/proc/{pid}/fd'))
+            except OSError:
+                pass
+        return {
+            'processes': len(pids),
+            'cpu_percent': cpu_ticks * 100.0 / (self.clock_ticks * elapsed) if elapsed else None,
+            'rss_bytes': rss,
+            'pss_bytes': pss if pss_known else None,
+            'open_fds': fds,
+        }
+
+
+class ProcessLimitPolicy:
+    """Decides when a session's process tree has been over a soft limit long enough to act on"""
+
+    def __init__(self, cpu_percent=None, memory_mb=None, fds=None, samples=PROCESS_LIMIT_SAMPLES,
+                 cooldown=PROCESS_LIMIT_COOLDOWN_SECONDS):
+        self.cpu_percent = PROCESS_LIMIT_CPU_PERCENT if cpu_percent is None else cpu_percent
+        self.memory_mb = PROCESS_LIMIT_MEMORY_MB if memory_mb is None else memory_mb
+        self.fds = PROCESS_LIMIT_FDS if fds is None else fds
+        self.samples = samples
+        self.cooldown = cooldown
+        self.over_counts = {}
+        self.last_action = {}
+
+    @property
+    def enabled(self):
+        return bool(self.cpu_percent or self.memory_mb or self.fds)
+
+    def breach(self, usage):
+        """Which limit a single sample exceeds, or None"""
+        memory = usage['pss_bytes'] if usage['pss_bytes'] is not None else usage['rss_bytes']
+        if self.cpu_percent and usage['cpu_percent'] is not None and usage['cpu_percent'] > self.cpu_percent:
+            return f"CPU {usage['cpu_percent']:.0f}% > {self.cpu_percent:.0f}%"
+        if self.memory_mb and memory > self.memory_mb * 1024 * 1024:
+            return f"memory {memory / (1024 * 1024):.0f} MB > {self.memory_mb:.0f} MB"
+        if self.fds and usage['open_fds'] > self.fds:
+            return f"{usage['open_fds']} open files > {self.fds}"
+        return None
+
+    def reason(self, session_id, usage):
+        """Return why the session should be recycled/restarted now, or None"""
+        breach = self.breach(usage)
+        if breach is None:
+            self.over_counts.pop(session_id, None)
+            return None
+        self.over_counts[session_id] = self.over_counts.get(session_id, 0) + 1
+        if self.over_counts[session_id] < self.samples:
+            return None
+        if time.time() - self.last_action.get(session_id, 0) < self.cooldown:
+            return None
+        self.over_counts.pop(session_id, None)
+        self.last_action[session_id] = time.time()
+        return breach
+
+
+def _format_process_usage(usage):
+    memory = usage['pss_bytes'] if usage['pss_bytes'] is not None else usage['rss_bytes']
+    cpu = f"{usage['cpu_percent']:.0f}%" if usage['cpu_percent'] is not None else '-'
+    return (f"Browser CPU {cpu} | {'PSS' if usage['pss_bytes'] is not None else 'RSS'} "
+            f"{memory / (1024 * 1024):.0f} MB | {usage['processes']} processes | {usage['open_fds']} open files")
+
+
+def _split_url_patterns(text):
+    """Split comma-separated regexes, keeping commas inside {m,n}, [...] or escaped as part of the pattern"""
+    patterns = []
+    current = ''
+    braces = 0
+    in_class = False
+    escaped = False
+    for char in text:
+        if escaped:
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif in_class:
+            in_class = char != ']'
+        elif char == '[':
+            in_class = True
+        elif char == '{':
+            braces += 1
+        elif char == '}':
+            braces = max(0, braces - 1)
+        elif char == ',' and braces == 0:
+            patterns.append(current)
+            current = ''
+            continue
+        current += char
+    patterns.append(current)
+    return [pattern.strip() for pattern in patterns if pattern.strip()]
+
+
+def _compile_url_patterns(text):
+    """Compile the URL block list into one regex; returns (regex or None, error message or None)"""
+    patterns = _split_url_patterns(text)
+    if not patterns:
+        return None, None
+    for pattern in patterns:
+        try:
+            re.compile(pattern)
+        except re.error as e:
+            return None, f"invalid pattern '{pattern}': {e}"
+    try:
+        return re.compile('|'.join(f'(?:{p})' for p in patterns)), None
+    except re.error as e:
+        return None, f"patterns cannot be combined: {e}"
+
+
+BLOCK_URL_REGEX, BLOCK_URL_PATTERN_ERROR = _compile_url_patterns(BLOCK_URL_PATTERNS_TEXT)
+
+
+class NetworkPolicy:
+    """Context-level request routing that refuses unneeded resources and counts what was saved"""
+
+    def __init__(self, resource_types=None, url_regex=None):
+        if resource_types is None and url_regex is None:
+            # A bad URL pattern turns the whole policy off (reported once at startup)
+            resource_types = [] if BLOCK_URL_PATTERN_ERROR else BLOCK_RESOURCE_TYPES
+            url_regex = BLOCK_URL_REGEX
+        self.resource_types = set(resource_types or ())
+        self.url_regex = url_regex
+        self.lock = threading.Lock()
+        self.blocked_requests = 0
+        self.blocked_by_type = {}
+        self.bytes_saved_estimate = 0
+        self.downloads_seen = 0
+        # Running content-length totals of allowed responses, used to estimate blocked bytes
+        self.seen_bytes = {}
+        self.seen_counts = {}
+
+    @property
+    def enabled(self):
+        return bool(self.resource_types or self.url_regex)
+
+    def install(self, context):
+        """Route every request of the browser context through the policy (no-op when nothing is blocked)"""
+        # Note: Playwright turns the HTTP cache off for a context with routes, so every allowed
+        # request (also after a page recycle) is fetched again; see 'bytes_allowed' in snapshot()
+        if not self.enabled:
+            return
+        context.route('**/*', self._handle_route)
+        context.on('response', self._handle_response)
+
+    def _handle_route(self, route):
+        request = route.request
+        resource_type = request.resource_type
+        if resource_type in self.resource_types or (self.url_regex and self.url_regex.search(request.url)):
+            try:
+                route.abort('blockedbyclient')
+            except Exception:
+                return
+            with self.lock:
+                self.blocked_requests += 1
+                self.blocked_by_type[resource_type] = self.blocked_by_type.get(resource_type, 0) + 1
+                count = self.seen_counts.get(resource_type)
+                if count:
+                    self.bytes_saved_estimate += self.seen_bytes[resource_type] // count
+        else:
+            try:
+                route.continue_()
+            except Exception:
+                pass
+
+    def _handle_response(self, response):
+        length = response.headers.get('content-length')
+        if not length or not length.isdigit():
+            return
+        resource_type = response.request.resource_type
+        with self.lock:
+            self.seen_bytes[resource_type] = self.seen_bytes.get(resource_type, 0) + int(length)
+            self.seen_counts[resource_type] = self.seen_counts.get(resource_type, 0) + 1
+
+    def record_download(self):
+        with self.lock:
+            self.downloads_seen += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'blocked_requests': self.blocked_requests,
+                'blocked_by_type': dict(self.blocked_by_type),
+                'bytes_saved_estimate': self.bytes_saved_estimate,
+                'bytes_allowed': sum(self.seen_bytes.values()),
+                'downloads_seen': self.downloads_seen,
+            }
+
+
+def _fake_camera_args(source):
+    """Chromium flags that replace the webcam with a synthetic stream from `source`"""
+    args = ['--use-fake-device-for-media-stream', '--use-fake-ui-for-media-stream']
+    if source.lower() in ('1', 'true', 'test'):
+        return args
+    path = os.path.abspath(source)
+    if not os.path.isfile(path):
+        raise ValueError(f"file not found: {path}")
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.jpg', '.jpeg'):
+        # Chromium only reads .y4m/.mjpeg; a lone JPEG is a valid single-frame MJPEG stream.
+        # The copy goes in the app's own folder, never next to the user's image
+        name = f"{os.path.splitext(os.path.basename(path))[0]}_{hashlib.sha1(path.encode('utf-8')).hexdigest()[:8]}.mjpeg"
+        for directory in (FAKE_CAMERA_DIR, os.path.join(tempfile.gettempdir(), 'snapchat_fake_camera')):
+            mjpeg_path = os.path.join(directory, name)
+            try:
+                if not os.path.exists(mjpeg_path) or os.path.getmtime(mjpeg_path) < os.path.getmtime(path):
+                    os.makedirs(directory, exist_ok=True)
+                    # Several sessions may launch at once; replace atomically so none reads a partial file
+                    temp_path = f'{mjpeg_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+                    shutil.copyfile(path, temp_path)
+                    os.replace(temp_path, mjpeg_path)
+                break
+            except OSError as e:
+                error = e
+        else:
+            raise OSError(f"cannot write the .mjpeg copy of {path}: {error}")
+        path = mjpeg_path
+    elif extension not in ('.y4m', '.mjpeg'):
+        raise ValueError(f"unsupported file type {extension} (use .y4m, .mjpeg or .jpg)")
+    args.append(f'--use-file-for-fake-video-capture={path}')
+    return args
+
+
+def _classify_level(message):
+    """Derive a log level from a free-text status message"""
+    text = message.lower().replace('error: none', '')
+    if re.search(r'error|fail|fatal|exception|timeout|traceback', text):
+        return 'error'
+    if re.search(r'warn|postponed|unavailable|stopped', text):
+        return 'warning'
+    return 'info'
+
+
+class EventLog:
+    """Rotating JSONL event log written by a dedicated thread from a bounded queue"""
+
+    def __init__(self, directory=None, max_bytes=None, compress=None, queue_size=EVENT_LOG_QUEUE_SIZE):
+        self.directory = directory or EVENT_LOG_DIR
+        self.max_bytes = int(EVENT_LOG_MAX_MB * 1024 * 1024) if max_bytes is None else max_bytes
+        self.compress = EVENT_LOG_COMPRESS if compress is None else compress
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.written = 0
+        self.file = None
+        self.path = None
+        self.day = None
+        self.part = 0
+        self.thread = None
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self.thread = threading.Thread(target=self._writer, daemon=True)
+        self.thread.start()
+
+    def log(self, session_id, message, kind='status', level=None, data=None):
+        """Queue an event; never blocks - events are dropped (and counted) if the writer falls behind"""
+        now = time.time()
+        record = {
+            'ts': now,
+            'time': datetime.fromtimestamp(now).isoformat(timespec='milliseconds'),
+            'session': session_id,
+            'level': level or _classify_level(message),
+            'kind': kind,
+            'message': message,
+        }
+        if data is not None:
+            record['data'] = data
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout=5):
+        if self.thread and self.thread.is_alive():
+            try:
+                self.queue.put(None, timeout=timeout)
+            except queue.Full:
+                pass
+            self.thread.join(timeout)
+
+    def _writer(self):
+        reported_drops = 0
+        while True:
+            try:
+                record = self.queue.get(timeout=1)
+            except queue.Empty:
+                continue
+            if record is None:
+                break
+            batch = [record]
+            # Drain whatever else is waiting so disk writes happen in batches
+            while len(batch) < 1000:
+                try:
+                    record = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if record is None:
+                    self._write_batch(batch)
+                    self._close_file()
+                    return
+                batch.append(record)
+            if self.dropped > reported_drops:
+                batch.append({'ts': time.time(), 'time': datetime.now().isoformat(timespec='milliseconds'),
+                              'session': 0, 'level': 'warning', 'kind': 'log',
+                              'message': f'Event log queue full, dropped {self.dropped - reported_drops} events'})
+                reported_drops = self.dropped
+            self._write_batch(batch)
+        self._close_file()
+
+    def _write_batch(self, batch):
+        try:
+            for record in batch:
+                self._rotate_if_needed(record['ts'])
+                self.file.write(json.dumps(record) + '\n')
+                self.written += 1
+            self.file.flush()
+        except OSError:
+            # Disk trouble must never take the automation down
+            self._close_file()
+
+    def _rotate_if_needed(self, ts):
+        day = datetime.fromtimestamp(ts).strftime('%Y-%m-%d')
+        if self.file is not None and day == self.day and self.file.tell() < self.max_bytes:
+            return
+        self._close_file()
+        if day != self.day:
+            self.day = day
+            self.part = self._last_part(day)
+        self.part += 1
+        self.path = os.path.join(self.directory, f'events_{day}_{self.part:03d}.jsonl')
+        self.file = open(self.path, 'a', encoding='utf-8')
+
+    def _last_part(self, day):
+        parts = [0]
+        for name in os.listdir(self.directory):
+            match = re.match(rf'^events_{day}_(\d+)\.jsonl(\.gz)?$', name)
+            if match:
+                parts.append(int(match.group(1)))
+        return max(parts)
+
+    def _close_file(self):
+        if self.file is None:
+            return
+        try:
+            self.file.close()
+        except OSError:
+            pass
+        self.file = None
+        if self.compress and self.path and os.path.exists(self.path):
+            try:
+                with open(self.path, 'rb') as src, gzip.open(self.path + '.gz', 'wb') as dst:
+                    shutil.copyfileobj(src, dst)
+                os.remove(self.path)
+            except OSError:
+                pass
+
+
+class Tracer:
+    """Collects spans as Chrome Trace Event records for Perfetto or chrome://tracing"""
+    # Each session is one trace "process"; the in-page loop gets its own track
+    PAGE_TID = 1
+
+    def __init__(self, max_events=TRACE_MAX_EVENTS):
+        self.events = deque(maxlen=max_events)
+        self.thread_names = {}
+        self.lock = threading.Lock()
+
+    def add_span(self, name, session_id, start, duration, tid=None, thread_name=None, cat='python', args=None):
+        """Record a complete span; `start` is epoch seconds and `duration` seconds"""
+        if tid is None:
+            tid = threading.get_ident()
+            thread_name = threading.current_thread().name
+        event = {'name': name, 'cat': cat, 'ph': 'X', 'pid': session_id, 'tid': tid,
+                 'ts': int(start * 1000000), 'dur': max(0, int(duration * 1000000))}
+        if args:
+            event['args'] = args
+        with self.lock:
+            self.events.append(event)
+            if thread_name and (session_id, tid) not in self.thread_names:
+                self.thread_names[(session_id, tid)] = thread_name
+
+    @contextmanager
+    def span(self, name, session_id, cat='python', **args):
+        started = time.time()
+        try:
+            yield
+        finally:
+            self.add_span(name, session_id, started, time.time() - started, cat=cat, args=args or None)
+
+    def add_page_span(self, session_id, name, start_ms, duration_ms, args=None):
+        self.add_span(name, session_id, start_ms / 1000.0, duration_ms / 1000.0,
+                      tid=self.PAGE_TID, thread_name='page mainLoop', cat='page', args=args)
+
+    def add_round(self, session_id, result):
+        """Turn a round result from the page into a round span with one child span per step"""
+        started = result.get('startedAt')
+        timings = result.get('timings') or {}
+        if not started:
+            return
+        args = {'round': result.get('round'), 'success': result.get('success'),
+                'selected': result.get('selectedCount'), 'error': result.get('error')}
+        self.add_page_span(session_id, f"round {result.get('round')}", started, timings.get('total', 0), args)
+        for step, step_start in (result.get('stepStarts') or {}).items():
+            self.add_page_span(session_id, step, step_start, timings.get(step, 0))
+
+    def drain(self):
+        """Remove and return collected events (used by worker processes to ship them to the coordinator)"""
+        with self.lock:
+            events = list(self.events)
+            self.events.clear()
+            return events, dict(self.thread_names)
+
+    def extend(self, events, thread_names):
+        with self.lock:
+            self.events.extend(events)
+            for key, name in thread_names.items():
+                self.thread_names.setdefault(tuple(key), name)
+
+    def to_json(self):
+        with self.lock:
+            events = list(self.events)
+            thread_names = dict(self.thread_names)
+        metadata = []
+        for pid in sorted({event['pid'] for event in events}):
+            metadata.append({'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0,
+                             'args': {'name': f'Session {pid}' if pid else 'App'}})
+            metadata.append({'name': 'process_sort_index', 'ph': 'M', 'pid': pid, 'tid': 0,
+                             'args': {'sort_index': pid}})
+        for (pid, tid), name in sorted(thread_names.items()):
+            metadata.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}})
+        return {'traceEvents': metadata + events, 'displayTimeUnit': 'ms'}
+
+    def export(self, path):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_json(), f)
+
+
+# Process-wide tracer, present only when tracing is enabled
+TRACER = Tracer() if TRACE_FILE else None
+
+
+def _trace_since(name, session_id, started, **args):
+    """Record a Python-side span from `started` (epoch seconds) until now"""
+    if TRACER:
+        TRACER.add_span(name, session_id, started, time.time() - started, args=args or None)
+
+
+class MetricsServer:
+    """Local HTTP server exposing fleet metrics (Prometheus text / JSON) and session controls"""
+
+    def __init__(self, app, host=METRICS_HOST, port=METRICS_PORT):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.httpd = None
+        self.thread = None
+
+    def start(self):
+        handler = type('MetricsRequestHandler', (_MetricsRequestHandler,), {'app': self.app})
+        self.httpd = ThreadingHTTPServer((self.host, self.port), handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.httpd:
+            try:
+                self.httpd.shutdown()
+                self.httpd.server_close()
+            except Exception:
+                pass
+            self.httpd = None
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    app = None
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0].rstrip('/')
+        if path == '/metrics':
+            body = _format_prometheus(self.app._fleet_snapshot())
+            self._send(200, body, 'text/plain; version=0.0.4; charset=utf-8')
+        elif path in ('', '/metrics.json', '/status'):
+            self._send_json(200, self.app._fleet_snapshot())
+        elif path == '/trace' and TRACER:
+            self._send(200, json.dumps(TRACER.to_json()), 'application/json')
+        else:
+            self._send_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        # POST /sessions/<id>/<action> or /sessions/all/<action>
+        match = re.match(r'^/sessions/(\d+|all)/(\w+)/?$', self.path.split('?', 1)[0])
+        if not match:
+            self._send_json(404, {'error': 'not found'})
+            return
+        target, action = match.groups()
+        if action not in SESSION_ACTIONS:
+            self._send_json(400, {'error': f'unknown action {action}', 'actions': list(SESSION_ACTIONS)})
+            return
+        if target == 'all':
+            session_ids = sorted(self.app.sessions.keys())
+        else:
+            session_ids = [int(target)]
+            if session_ids[0] not in self.app.sessions:
+                self._send_json(404, {'error': f'no session {target}'})
+                return
+        for session_id in session_ids:
+            self.app.control_queue.put((action, session_id))
+        self._send_json(202, {'accepted': action, 'sessions': session_ids})
+
+    def _send_json(self, code, payload):
+        self._send(code, json.dumps(payload, indent=2), 'application/json')
+
+    def _send(self, code, body, content_type):
+        data = body.encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # Keep the console quiet - requests are not worth logging
+        pass
+
+
+def _prometheus_label_value(value):
+    """Escape a label value for the text exposition format"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_prometheus(snapshot):
+    """Render a fleet snapshot in the Prometheus text exposition format"""
+    lines = [
+        '# HELP snapchat_working_seconds Seconds since the fleet was launched',
+        '# TYPE snapchat_working_seconds gauge',
+        f"snapchat_working_seconds {snapshot['working_seconds'] or 0:.3f}",
+    ]
+    families = {}
+
+    def add(name, kind, help_text, labels, value):
+        if value is None:
+            return
+        family = families.setdefault(name, (kind, help_text, []))
+        label_str = ','.join(f'{key}="{_prometheus_label_value(val)}"' for key, val in labels.items())
+        family[2].append(f'{name}{{{label_str}}} {value}')
+
+    for session in snapshot['sessions']:
+        sid = {'session': session['session_id']}
+        stats = session['stats']
+        add('snapchat_session_up', 'gauge', 'Whether the session thread is running',
+            sid, int(session['is_running']))
+        add('snapchat_session_state', 'gauge', 'Current session state (1 for the active state)',
+            dict(sid, state=session['state']), 1)
+        lifecycle = session.get('lifecycle') or {}
+        for key, name, help_text in (
+                ('time_to_login', 'snapchat_time_to_login_seconds', 'Seconds from the login page to a logged-in view'),
+                ('time_to_first_send', 'snapchat_time_to_first_send_seconds', 'Seconds from session creation to the first successful round'),
+                ('degraded_seconds', 'snapchat_degraded_seconds_total', 'Seconds spent in the degraded state'),
+                ('running_rounds_per_minute', 'snapchat_running_rounds_per_minute', 'Rounds per minute while in the running state')):
+            value = lifecycle.get(key)
+            add(name, 'counter' if key == 'degraded_seconds' else 'gauge', help_text,
+                sid, f"{value:.3f}" if value is not None else None)
+        add('snapchat_photos_sent_total', 'counter', 'Photos sent, as reported by the page',
+            sid, session['sent_count'])
+        for result, key in (('success', 'successes'), ('failure', 'failures'), ('exception', 'exceptions')):
+            add('snapchat_rounds_total', 'counter', 'Rounds completed by result',
+                dict(sid, result=result), stats[key])
+        add('snapchat_pipeline_saved_ms_total', 'counter', 'Milliseconds of fixed waits skipped by pipelined rounds',
+            sid, stats.get('time_saved_ms'))
+        add('snapchat_rounds_per_minute', 'gauge', 'Rounds completed over the last minute',
+            sid, f"{stats['rounds_per_minute']:.2f}")
+        for kind, count in stats['errors'].items():
+            add('snapchat_errors_total', 'counter', 'Errors by kind',
+                dict(sid, kind=kind), count)
+        add('snapchat_page_recycles_total', 'counter', 'Scheduled page reloads',
+            sid, session.get('recycles'))
+        processes = session.get('processes') or {}
+        for key, name, help_text in (
+                ('processes', 'snapchat_browser_processes', 'Processes in the session\'s browser tree'),
+                ('cpu_percent', 'snapchat_browser_cpu_percent', 'CPU use of the browser tree (100 = one core)'),
+                ('rss_bytes', 'snapchat_browser_rss_bytes', 'Resident memory of the browser tree (shared pages counted per process)'),
+                ('pss_bytes', 'snapchat_browser_pss_bytes', 'Proportional set size of the browser tree'),
+                ('open_fds', 'snapchat_browser_open_fds', 'Open file descriptors of the browser tree')):
+            value = processes.get(key)
+            add(name, 'gauge', help_text, sid, f"{value:.1f}" if key == 'cpu_percent' and value is not None else value)
+        resume_latency = session.get('resume_latency')
+        add('snapchat_resume_latency_seconds', 'gauge', 'Seconds from the last resume request to the next round start',
+            sid, f"{resume_latency:.3f}" if resume_latency is not None else None)
+        network = session.get('network') or {}
+        for resource_type, count in network.get('blocked_by_type', {}).items():
+            add('snapchat_requests_blocked_total', 'counter', 'Requests refused by the network policy',
+                dict(sid, type=resource_type), count)
+        add('snapchat_bytes_saved_estimate_total', 'counter',
+            'Estimated bytes not downloaded (mean size of allowed responses of the same type); '
+            'does not subtract cache hits lost while blocking is on',
+            sid, network.get('bytes_saved_estimate'))
+        add('snapchat_bytes_allowed_total', 'counter',
+            'Bytes of allowed responses (content-length) while blocking is on; the HTTP cache is off then, so all are refetched',
+            sid, network.get('bytes_allowed'))
+        add('snapchat_downloads_seen_total', 'counter', 'Downloads that reached Playwright despite the policy',
+            sid, network.get('downloads_seen'))
+        for metric, name, help_text in (
+                ('JSHeapUsedSize', 'snapchat_page_js_heap_used_bytes', 'JS heap in use (CDP Performance.getMetrics)'),
+                ('Nodes', 'snapchat_page_dom_nodes', 'DOM node count (CDP Performance.getMetrics)'),
+                ('JSEventListeners', 'snapchat_page_event_listeners', 'JS event listener count (CDP Performance.getMetrics)'),
+                ('TaskDuration', 'snapchat_page_task_seconds_total', 'Main-thread task time (CDP Performance.getMetrics)')):
+            add(name, 'counter' if metric == 'TaskDuration' else 'gauge', help_text,
+                sid, session.get('perf', {}).get(metric))
+        for step, quantiles in stats['step_latency_ms'].items():
+            for quantile, value in quantiles.items():
+                add('snapchat_step_latency_ms', 'gauge', 'Step latency percentiles in milliseconds',
+                    dict(sid, step=step, quantile=quantile), value)
+
+    for name, (kind, help_text, samples) in families.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        lines.extend(samples)
+    return '\n'.join(lines) + '\n'
+
+
 class ChromeSession:
-    def __init__(self, session_id, user_data_dir, friends_list, status_callback, start_time=None):
+    def __init__(self, session_id, user_data_dir, friends_list, status_callback, start_time=None, event_callback=None):
         self.session_id = session_id
         self.user_data_dir = user_data_dir
         self.friends_list = friends_list
         self.status_callback = status_callback
+        # event_callback(session_id, kind, message, data) receives structured events for the logs
+        self.event_callback = event_callback
         self.start_time = start_time
         self.playwright = None
         self.browser = None
         self.page = None
         self.is_running = False
+        self.is_paused = False
         self.thread = None
         self.sent_count = 0
-        
-    def start(self):
+        self.stats = SessionStats()
+        self.lifecycle = SessionLifecycle(session_id, self._on_state_change)
+        self.perf_sampler = None
+        self.cdp = None
+        self.recycle_policy = RecyclePolicy()
+        self.network_policy = NetworkPolicy()
+        self.recycle_count = 0
+        self.last_recycle = None
+        self.recycle_rounds_mark = 0
+        self.recycle_time_mark = time.time()
+        # Failed recycles in a row (the page is left without a running loop) and the round to resume from
+        self.recycle_failures = 0
+        self.recycle_round_number = 0
+        # When the last resume was requested, and how long the parked loop took to start its next round
+        self.resume_requested_at = None
+        self.resume_latency = None
+        self.recycle_request_reason = None
+        # Playwright's sync API is bound to the session thread, so other threads
+        # (GUI, HTTP endpoint) hand work over through this queue
+        self.commands = queue.Queue()
+
+    def start(self, wait_for=None):
+        """Start the session thread, optionally after `wait_for` (a previous thread on the same profile) exits"""
         if self.is_running:
             return
         self.is_running = True
-        self.thread = threading.Thread(target=self._run_automation, daemon=True)
+        self.thread = threading.Thread(target=self._run_automation, args=(wait_for,), daemon=True)
         self.thread.start()
-        
+
     def stop(self):
+        """Ask the session thread to stop; the browser is closed from that thread"""
         self.is_running = False
+        self.lifecycle.transition(SessionState.STOPPING, 'stop requested')
+        self.commands.put('stop')
+
+    def pause(self):
+        self.commands.put('pause')
+
+    def resume(self):
+        self.resume_requested_at = time.time()
+        self.commands.put('resume')
+
+    def recycle(self, reason='requested'):
+        """Ask the session thread to reload the page at the next round boundary"""
+        self.recycle_request_reason = reason
+        self.commands.put('recycle')
+
+    def snapshot(self):
+        """Return a JSON-serialisable view of the session for the GUI and metrics endpoint"""
+        lifecycle = self.lifecycle.snapshot()
+        # The session thread clears perf_sampler on close; read it once so it cannot vanish mid-expression
+        perf_sampler = self.perf_sampler
+        return {
+            'session_id': self.session_id,
+            'state': lifecycle['state'],
+            'lifecycle': lifecycle,
+            'is_running': self.is_running,
+            'is_paused': self.is_paused,
+            'sent_count': self.sent_count,
+            'stats': self.stats.snapshot(),
+            'perf': perf_sampler.snapshot() if perf_sampler else {},
+            'recycles': self.recycle_count,
+            'network': self.network_policy.snapshot(),
+            'last_recycle': self.last_recycle,
+            'resume_latency': self.resume_latency,
+        }
+
+    def _launch_options(self):
+        """Keyword arguments for launch_persistent_context"""
+        options = {
+            'user_data_dir': self.user_data_dir,
+            'headless': False,
+            'args': [
+                '--disable-blink-features=AutomationControlled',
+            ],
+            'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+            # Snapchat downloads photos automatically; refuse them in the browser itself
+            'accept_downloads': False,
+        }
+        if FAKE_CAMERA:
+            try:
+                options['args'].extend(_fake_camera_args(FAKE_CAMERA))
+                # Grant camera access up front so no "Allow" prompt is needed
+                options['permissions'] = ['camera', 'microphone']
+            except (ValueError, OSError) as e:
+                self.status_callback(self.session_id, f"Session {self.session_id}: Fake camera disabled - {str(e)}")
+        return options
+
+    def _wait_for_commands(self, timeout):
+        """Idle up to `timeout` seconds, handling queued commands and due perf samples as they arrive"""
+        deadline = time.time() + timeout
+        while self.is_running:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return
+            try:
+                command = self.commands.get_nowait()
+            except queue.Empty:
+                command = None
+            if command is not None:
+                self._handle_command(command)
+                continue
+            self._sample_performance()
+            self._pump_events(min(remaining, COMMAND_POLL_SECONDS))
+
+    def _pump_events(self, seconds):
+        """Wait while letting Playwright dispatch route handlers and exposed-function calls"""
+        # The sync API only delivers events while this thread is inside a Playwright call
+        if self.page is not None:
+            try:
+                self.page.wait_for_timeout(seconds * 1000)
+                return
+            except Exception:
+                pass
+        time.sleep(seconds)
+
+    def _sample_performance(self):
+        if not self.perf_sampler:
+            return
+        try:
+            started = time.time()
+            if self.perf_sampler.sample_if_due() is None:
+                return
+            _trace_since('perf sample', self.session_id, started)
+        except Exception as e:
+            self.status_callback(self.session_id, f"Session {self.session_id}: Perf sampling stopped - {str(e)}")
+            self.perf_sampler.close()
+            self.perf_sampler = None
+            return
+        if self.perf_sampler.sample_count % PERF_SUMMARY_EVERY == 0:
+            for flag in self.perf_sampler.summary()['flags']:
+                self.status_callback(self.session_id, f"PERF: {flag}")
+
+    def _handle_command(self, command):
+        if command == 'pause':
+            self.is_paused = True
+            self._set_page_paused(True)
+            self.lifecycle.transition(SessionState.PAUSED, 'pause requested')
+            self.status_callback(self.session_id, "Pause requested, halting at the next round boundary")
+        elif command == 'resume':
+            self.is_paused = False
+            self._set_page_paused(False)
+            self.lifecycle.transition(SessionState.RUNNING, 'resumed')
+            self.status_callback(self.session_id, "Resumed")
+        elif command == 'recycle':
+            if self.page is None or self.lifecycle.state not in (SessionState.RUNNING, SessionState.DEGRADED,
+                                                                 SessionState.PAUSED):
+                self.status_callback(self.session_id, f"Session {self.session_id}: Recycle skipped - automation not running")
+                return
+            started = time.time()
+            reason = self.recycle_request_reason or 'requested'
+            try:
+                self._recycle_page(reason)
+            except Exception as e:
+                self.stats.record_error(f"Recycle error: {str(e)}")
+                self.status_callback(self.session_id, f"Session {self.session_id}: Recycle failed - {str(e)}")
+            _trace_since('recycle', self.session_id, started, reason=reason)
+
+    def _set_page_paused(self, paused):
+        """Set the in-page pause flag, waking a loop parked at a round boundary when unpausing"""
+        if paused:
+            self._evaluate_quietly("window.__snapchatAutomation && (window.__snapchatAutomation.paused = true)")
+        else:
+            self._evaluate_quietly("""
+                if (window.__snapchatAutomation) {
+                    const state = window.__snapchatAutomation;
+                    state.paused = false;
+                    if (state.resumeWaiter) {
+                        const wake = state.resumeWaiter;
+                        state.resumeWaiter = null;
+                        wake();
+                    }
+                }
+            """)
+
+    def _park_at_round_boundary(self, timeout=30):
+        """Pause the in-page loop and wait until it is holding between rounds"""
+        self._set_page_paused(True)
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self.page.evaluate("!!(window.__snapchatAutomation && window.__snapchatAutomation.resumeWaiter)"):
+                return True
+            self._pump_events(0.1)
+        return False
+
+    def _maybe_recycle(self):
+        rounds_since = self.stats.rounds - self.recycle_rounds_mark
+        seconds_since = time.time() - self.recycle_time_mark
+        heap_bytes = self._read_heap_bytes() if self.recycle_policy.heap_check_due(rounds_since, seconds_since) else None
+        reason = self.recycle_policy.reason(rounds_since, heap_bytes, seconds_since)
+        if reason:
+            started = time.time()
+            self._recycle_page(reason)
+            _trace_since('recycle', self.session_id, started, reason=reason)
+
+    def _recycle_page(self, reason, park=True):
+        """Reload the page at a round boundary and re-inject the automation with counters preserved"""
+        started = time.time()
+        self.status_callback(self.session_id, f"Session {self.session_id}: Recycling page ({reason})...")
+        if park:
+            if not self._park_at_round_boundary():
+                self._set_page_paused(self.is_paused)
+                self.status_callback(self.session_id, f"Session {self.session_id}: Recycle postponed - round did not reach a boundary")
+                return
+            self.recycle_round_number = self.page.evaluate(
+                "window.__snapchatAutomation ? (window.__snapchatAutomation.roundNumber || 0) : 0")
+        self.lifecycle.transition(SessionState.RECYCLING, reason)
+        heap_before = self._read_heap_bytes()
+        nodes_before = self._count_dom_nodes()
+        # Retire the parked loop so nothing runs while the page unloads
+        self._evaluate_quietly("""
+            if (window.__snapchatAutomation) window.__snapchatAutomation.isRunning = false;
+            window.__snapchatAutomationRunning = false;
+        """)
+        outcome = self._reload_and_reinject(self.recycle_round_number)
+        if outcome is None:
+            # Nothing is running in the page now; the monitor retries the recycle on its next ticks
+            self.recycle_failures += 1
+            self.lifecycle.transition(SessionState.DEGRADED, 'recycle failed')
+            self.status_callback(self.session_id, f"Session {self.session_id}: Recycle failed ({reason}) - "
+                                 f"retry {self.recycle_failures} of {RECYCLE_RECOVERY_ATTEMPTS} on the next check")
+            return
+        self.recycle_failures = 0
+        if self.is_paused:
+            self.lifecycle.transition(SessionState.PAUSED, 'page recycled')
+        elif outcome == 'reloaded':
+            self.lifecycle.transition(SessionState.RUNNING, 'page recycled')
+        else:
+            self.lifecycle.transition(SessionState.DEGRADED, 'reload failed, automation re-injected')
+        heap_after = self._read_heap_bytes()
+        nodes_after = self._count_dom_nodes()
+
+        self.recycle_count += 1
+        self.recycle_rounds_mark = self.stats.rounds
+        self.recycle_time_mark = time.time()
+        duration = self.recycle_time_mark - started
+        self.last_recycle = {
+            'time': self.recycle_time_mark,
+            'reason': reason,
+            'duration_seconds': round(duration, 2),
+            'heap_before': heap_before,
+            'heap_after': heap_after,
+            'nodes_before': nodes_before,
+            'nodes_after': nodes_after,
+        }
+        self._emit_event('recycle', f"Page recycled ({reason})", self.last_recycle)
+        self.status_callback(
+            self.session_id,
+            f"Session {self.session_id}: Page recycled ({reason}) in {duration:.1f}s | "
+            f"heap {_format_metric('JSHeapUsedSize', heap_before or 0)} -> {_format_metric('JSHeapUsedSize', heap_after or 0)} | "
+            f"DOM nodes {nodes_before} -> {nodes_after}")
+        if self.recycle_policy.over_heap_limit(heap_after):
+            self.status_callback(
+                self.session_id,
+                f"Session {self.session_id}: WARNING heap still {_format_metric('JSHeapUsedSize', heap_after)} after recycle "
+                f"(limit {self.recycle_policy.max_heap_mb:.0f} MB) - next heap check in "
+                f"{RECYCLE_HEAP_MIN_ROUNDS} rounds / {RECYCLE_HEAP_MIN_SECONDS // 60} min")
+
+    def _reload_and_reinject(self, round_number):
+        """Reload and re-inject, retrying; returns 'reloaded', 'injected' (into the page as it is) or None"""
+        for attempt in range(1, RECYCLE_RELOAD_ATTEMPTS + 1):
+            try:
+                self.page.reload(wait_until='domcontentloaded', timeout=60000)
+                self.page.wait_for_selector('button.FBYjn.gK0xL.W5dIq, button.fE2D5', timeout=60000)
+                try:
+                    self.page.wait_for_load_state("networkidle", timeout=10000)
+                except PlaywrightTimeoutError:
+                    pass
+                self._inject_automation(round_number)
+                return 'reloaded'
+            except Exception as e:
+                self.stats.record_error(f"Recycle error: {str(e)}")
+                self.status_callback(self.session_id, f"Session {self.session_id}: Reload attempt {attempt} "
+                                                      f"of {RECYCLE_RELOAD_ATTEMPTS} failed - {str(e)}")
+        # Last resort: run the automation in whatever page did load
+        try:
+            self._inject_automation(round_number)
+            self.status_callback(self.session_id, f"Session {self.session_id}: Automation re-injected without a fresh reload")
+            return 'injected'
+        except Exception as e:
+            self.stats.record_error(f"Recycle error: {str(e)}")
+            self.status_callback(self.session_id, f"Session {self.session_id}: Re-injection failed - {str(e)}")
+            return None
+
+    def _read_heap_bytes(self):
+        """JS heap currently in use on the page, via CDP"""
+        try:
+            if self.cdp is None:
+                self.cdp = self.browser.new_cdp_session(self.page)
+            return self.cdp.send('Runtime.getHeapUsage')['usedSize']
+        except Exception:
+            return None
+
+    def _count_dom_nodes(self):
+        try:
+            return self.page.evaluate("document.getElementsByTagName('*').length")
+        except Exception:
+            return None
+
+    def _evaluate_quietly(self, script):
+        if self.page:
+            try:
+                self.page.evaluate(script)
+            except Exception:
+                pass
+
+    def _close_browser(self):
+        if self.perf_sampler:
+            summary = self.perf_sampler.close()
+            self.perf_sampler = None
+            flags = '; '.join(summary['flags']) or 'no growth trends flagged'
+            self.status_callback(self.session_id, f"PERF summary ({summary['samples']} samples): {flags}")
+        self.cdp = None
+        if self.network_policy.enabled:
+            network = self.network_policy.snapshot()
+            self.status_callback(self.session_id, f"Session {self.session_id}: Network policy refused {network['blocked_requests']} requests "
+                                                  f"(~{network['bytes_saved_estimate'] / 1024:.0f} KB saved; "
+                                                  f"{network['bytes_allowed'] / 1024:.0f} KB fetched with the HTTP cache off)")
         # Stop the JavaScript automation loop
         if self.page:
             try:
@@ -41,6 +1595,9 @@ class ChromeSession:
                         }
                     }
                     window.__snapchatAutomationRunning = false;
+                    if (window.__snapchatAutomation && window.__snapchatAutomation.resumeWaiter) {
+                        window.__snapchatAutomation.resumeWaiter();
+                    }
                 """)
             except:
                 pass
@@ -74,35 +1631,40 @@ class ChromeSession:
                 pass
             self.playwright = None
         self.page = None
-            
-    def _run_automation(self):
+
+    def _run_automation(self, wait_for=None):
+        # A persistent profile can only be opened by one browser at a time
+        if wait_for is not None and wait_for.is_alive():
+            wait_for.join()
         try:
+            if not self.is_running:
+                # Stopped while waiting for the previous browser; the finally marks it stopped
+                return
+            self.lifecycle.transition(SessionState.LAUNCHING)
             # Launch Playwright with persistent context
             try:
+                started = time.time()
                 self.playwright = sync_playwright().start()
-                self.browser = self.playwright.chromium.launch_persistent_context(
-                    user_data_dir=self.user_data_dir,
-                    headless=False,
-                    args=[
-                        '--disable-blink-features=AutomationControlled',
-                    ],
-                    user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-                )
-                
+                self.browser = self.playwright.chromium.launch_persistent_context(**self._launch_options())
+                _trace_since('launch browser', self.session_id, started)
+
+                # Refuse unneeded requests at the context level (before any page loads)
+                self.network_policy.install(self.browser)
+
                 # Get or create page
                 if self.browser.pages:
                     self.page = self.browser.pages[0]
                 else:
                     self.page = self.browser.new_page()
-                
-                # Block automatic downloads (Snapchat downloads photos automatically)
+
+                # Downloads are refused by the browser; count any that still surface
                 def handle_download(download):
-                    # Cancel the download to prevent files from being saved
+                    self.network_policy.record_download()
                     try:
                         download.cancel()
                     except:
                         pass
-                
+
                 self.page.on("download", handle_download)
                 
                 # Capture console messages and forward to status
@@ -117,26 +1679,49 @@ class ChromeSession:
             except Exception as e:
                 self.status_callback(self.session_id, f"Session {self.session_id}: Playwright error - {str(e)}")
                 self.status_callback(self.session_id, f"Session {self.session_id}: Make sure Playwright is installed: pip install playwright && playwright install chromium")
+                self.lifecycle.transition(SessionState.DEAD, f'Playwright error: {str(e)}')
                 self.is_running = False
                 return
                 
+            started = time.time()
             self.page.goto('https://www.snapchat.com')
+            _trace_since('goto', self.session_id, started)
             
             # Wait for login (user must login manually)
+            self.lifecycle.transition(SessionState.WAITING_LOGIN)
             self.status_callback(self.session_id, f"Session {self.session_id}: Waiting for login...")
             
             # Wait until logged in (check for camera button or similar)
-            try:
-                # Wait for camera button or main interface
-                self.page.wait_for_selector('button.FBYjn.gK0xL.W5dIq, button.fE2D5', timeout=300000)  # 5 min timeout
-                self.status_callback(self.session_id, f"Session {self.session_id}: Logged in, waiting 3 minutes for friends to load...")
-            except PlaywrightTimeoutError:
-                self.status_callback(self.session_id, f"Session {self.session_id}: Login timeout")
+            # Poll in short slices so a stop request does not wait out the 5 min timeout
+            started = time.time()
+            login_deadline = time.time() + 300  # 5 min timeout
+            logged_in = False
+            while self.is_running and not logged_in:
+                try:
+                    # Wait for camera button or main interface
+                    self.page.wait_for_selector('button.FBYjn.gK0xL.W5dIq, button.fE2D5', timeout=1000)
+                    logged_in = True
+                except PlaywrightTimeoutError:
+                    if time.time() >= login_deadline:
+                        break
+            if not logged_in:
+                if self.is_running:
+                    self.status_callback(self.session_id, f"Session {self.session_id}: Login timeout")
+                    self.lifecycle.transition(SessionState.DEAD, 'login timeout')
                 self.is_running = False
                 return
-                
-            # Wait 3 minutes for friends to load
-            time.sleep(180)
+            _trace_since('login wait', self.session_id, started)
+            self.lifecycle.transition(SessionState.WARMUP)
+            self.status_callback(self.session_id, f"Session {self.session_id}: Logged in, waiting 3 minutes for friends to load...")
+            self._start_perf_sampler()
+
+            # Wait 3 minutes for friends to load (commands are still handled meanwhile)
+            started = time.time()
+            self._wait_for_commands(180)
+            _trace_since('warmup', self.session_id, started)
+            if not self.is_running:
+                return
+            self.lifecycle.transition(SessionState.STARTING)
             self.status_callback(self.session_id, f"Session {self.session_id}: Starting automation...")
             
             # Wait for page to be ready
@@ -148,99 +1733,144 @@ class ChromeSession:
             # Expose communication bridge for status updates (must be before script injection)
             self.page.expose_function("reportStatus", lambda msg: self.status_callback(self.session_id, msg))
             self.page.expose_function("reportSentCount", lambda count: self._update_sent_count(count))
-            
+            self.page.expose_function("reportRound", lambda result: self._record_round(result))
+            if TRACER:
+                self.page.expose_function("reportSpan", lambda name, start, duration, args=None:
+                                          TRACER.add_page_span(self.session_id, name, start, duration, args))
+
             # Test console handler
             try:
                 self.page.evaluate("console.log('[Iteration 1] Console handler test - if you see this, handler is working!')")
-                time.sleep(0.5)  # Give it time to process
+                self._pump_events(0.5)  # Give it time to process
             except Exception as e:
                 self.status_callback(self.session_id, f"Session {self.session_id}: Console test error: {str(e)}")
             
             # Inject in-page automation script and start the loop
             try:
-                automation_js = self._get_automation_script()
-                
-                # First inject the automation script
-                self.page.evaluate(f"""
-                    console.log('[Iteration 1] Script injection started');
-                    {automation_js}
-                """)
-                
-                # Then initialize and start the automation
-                # Calculate start_time in milliseconds for JavaScript
-                start_time_ms = int(self.start_time * 1000) if self.start_time else None
-                start_time_js = start_time_ms if start_time_ms else 'Date.now()'
-                
-                result = self.page.evaluate(f"""
-                    (function() {{
-                        try {{
-                            console.log('[Iteration 1] Initialization function started');
-                            
-                            if (window.__snapchatAutomationRunning) {{
-                                console.log('[Iteration 1] Automation already running, skipping initialization');
-                                return 'ALREADY_RUNNING';
-                            }}
-                            
-                            const friendsList = {json.dumps(self.friends_list)};
-                            console.log('[Iteration 1] Friends list loaded:', friendsList);
-                            
-                            // Initialize automation state
-                            const startTimeMs = {start_time_js};
-                            window.__snapchatAutomation = {{
-                                friendsList: friendsList,
-                                sentCount: 0,
-                                isRunning: true,
-                                intervalId: null,
-                                startTime: startTimeMs
-                            }};
-                            
-                            window.__snapchatAutomationRunning = true;
-                            
-                            // Start the main loop (it handles continuous execution internally)
-                            if (window.mainLoop) {{
-                                console.log('[Iteration 1] Starting main loop...');
-                                window.mainLoop();
-                            }} else {{
-                                console.log('[Iteration 1] ERROR: mainLoop function not found!');
-                                if (window.reportStatus) window.reportStatus('[Iteration 1] ERROR: mainLoop function not found!');
-                            }}
-                            
-                            return 'SUCCESS';
-                        }} catch (error) {{
-                            console.error('[Iteration 1] Script injection error:', error);
-                            return 'ERROR: ' + error.message;
-                        }}
-                    }})();
-                """)
-                
-                # Verify script was injected (silently)
-                time.sleep(1)
-                is_running = self.page.evaluate("window.__snapchatAutomationRunning === true")
-                has_mainloop = self.page.evaluate("typeof window.mainLoop === 'function'")
-                
+                started = time.time()
+                self._inject_automation()
+                _trace_since('inject', self.session_id, started)
+                self.recycle_time_mark = time.time()
+                self.lifecycle.transition(SessionState.PAUSED if self.is_paused else SessionState.RUNNING)
             except Exception as e:
+                self.stats.record_error(f"Injection error: {str(e)}")
                 self.status_callback(self.session_id, f"Session {self.session_id}: ERROR injecting script - {str(e)}")
                 import traceback
                 self.status_callback(self.session_id, f"Session {self.session_id}: Traceback: {traceback.format_exc()}")
-            
+
             # Monitor the automation (Python just maintains the session)
             while self.is_running:
                 try:
                     # Check if automation is still running
+                    started = time.time()
                     is_automation_running = self.page.evaluate("window.__snapchatAutomationRunning === true")
+                    _trace_since('monitor check', self.session_id, started)
+                    if not is_automation_running and 0 < self.recycle_failures < RECYCLE_RECOVERY_ATTEMPTS:
+                        # A recycle left the page without the automation; try again rather than give up
+                        self._recycle_page('retry after failed recycle', park=False)
+                        self._wait_for_commands(5)
+                        continue
                     if not is_automation_running:
                         self.status_callback(self.session_id, "Automation stopped in browser")
+                        self.lifecycle.transition(SessionState.DEAD, 'automation stopped in browser')
                         break
-                    time.sleep(5)  # Check every 5 seconds
+                    if self.recycle_policy.enabled:
+                        self._maybe_recycle()
+                    self._wait_for_commands(5)  # Check every 5 seconds
                 except Exception as e:
+                    self.stats.record_error(f"Monitor error: {str(e)}")
+                    self.lifecycle.transition(SessionState.DEGRADED, f'monitor error: {str(e)}')
                     self.status_callback(self.session_id, f"Session {self.session_id}: Monitor error - {str(e)}")
-                    time.sleep(5)
-                    
+                    self._wait_for_commands(5)
+
         except Exception as e:
+            self.stats.record_error(f"Fatal error: {str(e)}")
+            self.lifecycle.transition(SessionState.DEAD, f'fatal error: {str(e)}')
             self.status_callback(self.session_id, f"Session {self.session_id}: Fatal error - {str(e)}")
         finally:
             self.is_running = False
+            self._close_browser()
+            self.lifecycle.transition(SessionState.STOPPED)
             
+    def _inject_automation(self, round_number=0):
+        """Inject the in-page script and start mainLoop, seeding counters so a reload keeps them"""
+        automation_js = self._get_automation_script()
+        
+        # First inject the automation script
+        self.page.evaluate(f"""
+            console.log('[Iteration 1] Script injection started');
+            {automation_js}
+        """)
+        
+        # Then initialize and start the automation
+        # Calculate start_time in milliseconds for JavaScript
+        start_time_ms = int(self.start_time * 1000) if self.start_time else None
+        start_time_js = start_time_ms if start_time_ms else 'Date.now()'
+        
+        result = self.page.evaluate(f"""
+            (function() {{
+                try {{
+                    console.log('[Iteration 1] Initialization function started');
+                    
+                    if (window.__snapchatAutomationRunning) {{
+                        console.log('[Iteration 1] Automation already running, skipping initialization');
+                        return 'ALREADY_RUNNING';
+                    }}
+                    
+                    const friendsList = {json.dumps(self.friends_list)};
+                    console.log('[Iteration 1] Friends list loaded:', friendsList);
+                    
+                    // Initialize automation state
+                    const startTimeMs = {start_time_js};
+                    window.__snapchatAutomation = {{
+                        friendsList: friendsList,
+                        sentCount: {int(self.sent_count)},
+                        roundNumber: {int(round_number)},
+                        pipeline: {json.dumps(PIPELINE_ROUNDS)},
+                        isRunning: true,
+                        paused: {json.dumps(self.is_paused)},
+                        resumeWaiter: null,
+                        intervalId: null,
+                        startTime: startTimeMs
+                    }};
+                    
+                    window.__snapchatAutomationRunning = true;
+                    
+                    // Start the main loop (it handles continuous execution internally)
+                    if (window.mainLoop) {{
+                        console.log('[Iteration 1] Starting main loop...');
+                        window.mainLoop();
+                    }} else {{
+                        console.log('[Iteration 1] ERROR: mainLoop function not found!');
+                        if (window.reportStatus) window.reportStatus('[Iteration 1] ERROR: mainLoop function not found!');
+                    }}
+                    
+                    return 'SUCCESS';
+                }} catch (error) {{
+                    console.error('[Iteration 1] Script injection error:', error);
+                    return 'ERROR: ' + error.message;
+                }}
+            }})();
+        """)
+        
+        # Verify script was injected (silently)
+        self._pump_events(1)
+        is_running = self.page.evaluate("window.__snapchatAutomationRunning === true")
+        has_mainloop = self.page.evaluate("typeof window.mainLoop === 'function'")
+        return result
+
+    def _start_perf_sampler(self):
+        """Start opt-in CDP performance sampling for this session's page"""
+        if PERF_SAMPLE_INTERVAL <= 0:
+            return
+        try:
+            sampler = PerfSampler(self.session_id, self.browser, self.page)
+            sampler.start()
+            self.perf_sampler = sampler
+            self.status_callback(self.session_id, f"Session {self.session_id}: Sampling page performance to {sampler.path}")
+        except Exception as e:
+            self.status_callback(self.session_id, f"Session {self.session_id}: Perf sampling unavailable - {str(e)}")
+
     def _get_automation_script(self):
         """Returns the JavaScript automation script that runs in-page"""
         return """
@@ -312,6 +1942,37 @@ class ChromeSession:
                 return null;
             }
             
+            // Pipelined mode: wait until the send has gone through, then bring the capture
+            // view straight back so the next round can shoot without reopening the camera
+            function waitForSendConfirmation(maxWait) {
+                return new Promise((resolve) => {
+                    const startTime = Date.now();
+                    let reopenClicked = false;
+                    const check = () => {
+                        const modalOpen = findElement('form.tvul8.pebzM') !== null;
+                        if (!modalOpen) {
+                            if (findElement('button.fE2D5')) {
+                                resolve(true);
+                                return;
+                            }
+                            const cameraBtn = findElement('button.FBYjn.gK0xL.W5dIq');
+                            if (cameraBtn && !reopenClicked) {
+                                try {
+                                    cameraBtn.click();
+                                    reopenClicked = true;
+                                } catch (e) {}
+                            }
+                        }
+                        if ((Date.now() - startTime) >= maxWait) {
+                            resolve(false);
+                        } else {
+                            setTimeout(check, 20);
+                        }
+                    };
+                    check();
+                });
+            }
+
             // Main round function - runs Step 1 → Step 7 in one continuous flow
             async function runRound() {
                 if (!window.__snapchatAutomation || !window.__snapchatAutomation.isRunning) {
@@ -320,7 +1981,7 @@ class ChromeSession:
                 
                 const roundStartTime = Date.now();
                 const friendsList = window.__snapchatAutomation.friendsList;
-                let roundResult = { success: false, selectedCount: 0, error: null, timings: {} };
+                let roundResult = { success: false, selectedCount: 0, error: null, timings: {}, stepStarts: {} };
                 
                 // Report round start with timestamp
                 if (window.reportStatus) {
@@ -338,6 +1999,7 @@ class ChromeSession:
                 try {
                     // Step 1: Check Send To Button
                     const step1Start = Date.now();
+                    roundResult.stepStarts.step1 = step1Start;
                     const photoImage = document.querySelector('img.VcjuA');
                     const sendToBtn = photoImage ? document.querySelector('button.YatIx.fGS78.eKaL7.Bnaur') : null;
                     const hasSendTo = sendToBtn !== null;
@@ -345,6 +2007,7 @@ class ChromeSession:
                     
                     // Step 2: Check Friend Modal
                     const step2Start = Date.now();
+                    roundResult.stepStarts.step2 = step2Start;
                     const friendModal = findElement('form.tvul8.pebzM');
                     const atFriendModal = friendModal !== null;
                     roundResult.timings.step2 = Date.now() - step2Start;
@@ -352,6 +2015,7 @@ class ChromeSession:
                     // Step 3: Open Camera (only if Steps 1 & 2 didn't skip)
                     if (!hasSendTo && !atFriendModal) {
                         const step3Start = Date.now();
+                        roundResult.stepStarts.step3 = step3Start;
                         
                         // Check if camera modal already open (use findElement to check visibility)
                         const shotBtnCheck = findElement('button.fE2D5');
@@ -386,6 +2050,7 @@ class ChromeSession:
                     // Step 4: Click Shot Button (only if Steps 1 & 2 didn't skip)
                     if (!hasSendTo && !atFriendModal) {
                         const step4Start = Date.now();
+                        roundResult.stepStarts.step4 = step4Start;
                         
                         const shotResult = await retryAction(async () => {
                             const shotBtn = document.querySelector('button.fE2D5');
@@ -427,9 +2092,17 @@ class ChromeSession:
                     // Step 5: Click Send To Button (only if Step 2 didn't skip)
                     if (!atFriendModal) {
                         const step5Start = Date.now();
+                        roundResult.stepStarts.step5 = step5Start;
                         
-                        // Delay 300ms before starting Step 5
-                        await sleep(300);
+                        if (window.__snapchatAutomation.pipeline) {
+                            // Pipelined: proceed as soon as Send To is clickable instead of a fixed 300ms pause
+                            const waitStart = Date.now();
+                            await waitForElement('button.YatIx.fGS78.eKaL7.Bnaur', 300, 20);
+                            roundResult.timings.step5Wait = Date.now() - waitStart;
+                        } else {
+                            // Delay 300ms before starting Step 5
+                            await sleep(300);
+                        }
                         
                         let attemptCount = 0;
                         const sendToResult = await retryAction(async () => {
@@ -478,6 +2151,7 @@ class ChromeSession:
                     
                     // Step 6: Select Friends
                     const step6Start = Date.now();
+                    roundResult.stepStarts.step6 = step6Start;
                     
                     let selectedCount = 0;
                     const friendListItems = document.querySelectorAll('ul.s7loS li');
@@ -514,6 +2188,7 @@ class ChromeSession:
                     // Step 7: Click Send Button
                     if (selectedCount > 0) {
                         const step7Start = Date.now();
+                        roundResult.stepStarts.step7 = step7Start;
                         
                         const sendResult = await retryAction(async () => {
                             const sendBtn = document.querySelector('button.TYX6O.eKaL7.Bnaur[type="submit"]');
@@ -542,6 +2217,12 @@ class ChromeSession:
                         if (window.reportSentCount) {
                             window.reportSentCount(window.__snapchatAutomation.sentCount);
                         }
+
+                        if (window.__snapchatAutomation.pipeline) {
+                            const confirmStart = Date.now();
+                            roundResult.cameraReady = await waitForSendConfirmation(2500);
+                            roundResult.timings.confirm = Date.now() - confirmStart;
+                        }
                     } else {
                         roundResult.error = 'Step 7: No friends selected';
                         if (window.reportStatus) window.reportStatus(roundResult.error);
@@ -558,11 +2239,31 @@ class ChromeSession:
                 return roundResult;
             }
             
+            // Hold at a round boundary while paused; resolved by the Python side on resume/stop
+            function waitWhilePaused() {
+                const state = window.__snapchatAutomation;
+                if (!state || !state.paused || !state.isRunning) {
+                    return Promise.resolve();
+                }
+                if (window.reportStatus) window.reportStatus('Paused at round boundary');
+                return new Promise(resolve => { state.resumeWaiter = resolve; });
+            }
+
             // Main continuous loop
             async function mainLoop() {
-                let roundNumber = 0;
+                let roundNumber = window.__snapchatAutomation ? (window.__snapchatAutomation.roundNumber || 0) : 0;
                 while (window.__snapchatAutomation && window.__snapchatAutomation.isRunning) {
+                    const pauseStart = Date.now();
+                    const wasPaused = window.__snapchatAutomation.paused;
+                    await waitWhilePaused();
+                    if (wasPaused && window.reportSpan) {
+                        window.reportSpan('paused', pauseStart, Date.now() - pauseStart, {});
+                    }
+                    if (!window.__snapchatAutomation || !window.__snapchatAutomation.isRunning) {
+                        break;
+                    }
                     roundNumber++;
+                    window.__snapchatAutomation.roundNumber = roundNumber;
                     const roundStartTime = Date.now();
                     
                     // Log round start
@@ -574,13 +2275,35 @@ class ChromeSession:
                     const roundDuration = roundEndTime - roundStartTime;
                     
                     // Log round completion
-                    const roundEndMsg = `[ROUND ${roundNumber}] Completed in ${roundDuration}ms | Success: ${roundResult.success} | Selected: ${roundResult.selectedCount} | Error: ${roundResult.error || 'none'}`;
+                    const pipelined = window.__snapchatAutomation.pipeline;
+                    // Only a confirmed send lets the next round start at once; otherwise the
+                    // friend modal may still be open and Step 6 would toggle the same friends again
+                    const confirmed = pipelined && roundResult.success && roundResult.cameraReady === true;
+                    if (confirmed) {
+                        // Fixed waits of the classic flow that this round did not spend
+                        const timings = roundResult.timings;
+                        const step5Saved = timings.step5Wait !== undefined ? Math.max(0, 300 - timings.step5Wait) : 0;
+                        timings.saved = step5Saved + Math.max(0, 2500 - (timings.confirm || 0));
+                    }
+                    const savedMsg = pipelined ? ` | Saved: ${roundResult.timings.saved || 0}ms` : '';
+                    const roundEndMsg = `[ROUND ${roundNumber}] Completed in ${roundDuration}ms | Success: ${roundResult.success} | Selected: ${roundResult.selectedCount} | Error: ${roundResult.error || 'none'}${savedMsg}`;
                     if (window.reportStatus) window.reportStatus(roundEndMsg);
-                    
+                    roundResult.timings.total = roundDuration;
+                    roundResult.round = roundNumber;
+                    roundResult.startedAt = roundStartTime;
+                    roundResult.resumed = wasPaused;
+                    if (window.reportRound) window.reportRound(roundResult);
+
                     // Calculate delay based on result
                     const delayCalcStart = Date.now();
                     let delay = 2500; // Default: 2.5 seconds on success
                     let delayReason = 'success';
+                    if (confirmed) {
+                        delay = 0; // Send already confirmed, capture view is back
+                        delayReason = 'pipelined';
+                    } else if (pipelined && roundResult.success) {
+                        delayReason = 'send not confirmed'; // Keep the normal 2.5 s
+                    }
                     if (roundResult.error) {
                         if (roundResult.error.includes('Exception')) {
                             delay = 5000; // 5 seconds on exception
@@ -616,6 +2339,9 @@ class ChromeSession:
                     const delayDiff = actualDelay - delay;
                     const delayEndMsg = `[ROUND ${roundNumber}] Delay END - waited ${actualDelay}ms (expected: ${delay}ms, diff: ${delayDiff}ms) | Ended at ${new Date(delayEndTime).toISOString()}`;
                     if (window.reportStatus) window.reportStatus(delayEndMsg);
+                    if (window.reportSpan) {
+                        window.reportSpan('delay', delayStartTime, actualDelay, { round: roundNumber, reason: delayReason, expected: delay });
+                    }
                     
                     // CRITICAL: Check if automation is still running before starting next round
                     if (!window.__snapchatAutomation || !window.__snapchatAutomation.isRunning) {
@@ -635,41 +2361,563 @@ class ChromeSession:
         })();
         """
     
+    def _record_round(self, result):
+        """Record a round result from the page"""
+        result = result or {}
+        self.stats.record_round(result)
+        self.lifecycle.record_round(bool(result.get('success')))
+        if result.get('resumed') and self.resume_requested_at and result.get('startedAt'):
+            # First round after the loop was parked: how quickly did a resume get it going again
+            self.resume_latency = max(0.0, result['startedAt'] / 1000.0 - self.resume_requested_at)
+            self.resume_requested_at = None
+            self.status_callback(self.session_id, f"Session {self.session_id}: Next round started "
+                                 f"{self.resume_latency * 1000:.0f}ms after resume")
+        if TRACER:
+            TRACER.add_round(self.session_id, result)
+        self._emit_event('round_result', f"Round {'succeeded' if result.get('success') else 'failed'}", result)
+
+    def _on_state_change(self, session_id, old_state, new_state, reason, timestamp):
+        message = f"State {old_state} -> {new_state}" + (f" ({reason})" if reason else "")
+        self._emit_event('state', message, {'from': old_state, 'to': new_state, 'reason': reason, 'time': timestamp})
+
+    def _emit_event(self, kind, message, data=None):
+        if self.event_callback:
+            self.event_callback(self.session_id, kind, message, data)
+
     def _update_sent_count(self, count):
         """Update sent count from JavaScript"""
         self.sent_count = count
 
 
+def _worker_main(worker_id, commands, events):
+    """Entry point of a session worker process: runs ChromeSessions and reports back over `events`"""
+    sessions = {}
+
+    def status(session_id, message):
+        events.put(('status', session_id, message))
+
+    def event(session_id, kind, message, data=None):
+        events.put(('event', session_id, kind, message, data))
+
+    next_snapshot = 0
+    while True:
+        try:
+            command = commands.get(timeout=WORKER_SNAPSHOT_SECONDS)
+        except queue.Empty:
+            command = None
+        if command is not None:
+            name, session_id = command[0], command[1]
+            if name == 'shutdown':
+                break
+            if name == 'start':
+                user_data_dir, friends_list, start_time = command[2:]
+                previous = sessions.get(session_id)
+                session = ChromeSession(session_id, user_data_dir, friends_list, status, start_time, event)
+                sessions[session_id] = session
+                session.start(wait_for=previous.thread if previous else None)
+            elif name in ('stop', 'pause', 'resume') and session_id in sessions:
+                getattr(sessions[session_id], name)()
+            elif name == 'recycle' and session_id in sessions:
+                sessions[session_id].recycle(command[2])
+        if time.time() >= next_snapshot:
+            for session_id, session in sessions.items():
+                events.put(('snapshot', session_id, session.snapshot()))
+            if TRACER:
+                trace_events, thread_names = TRACER.drain()
+                if trace_events:
+                    events.put(('trace', None, trace_events, list(thread_names.items())))
+            next_snapshot = time.time() + WORKER_SNAPSHOT_SECONDS
+
+    # Close the browsers before the process exits so their profiles are released;
+    # the sessions shut down in parallel against one deadline
+    for session in sessions.values():
+        session.stop()
+    deadline = time.time() + WORKER_SHUTDOWN_SECONDS
+    for session_id, session in sessions.items():
+        if session.thread:
+            session.thread.join(max(0.0, deadline - time.time()))
+        events.put(('snapshot', session_id, session.snapshot()))
+    if TRACER:
+        trace_events, thread_names = TRACER.drain()
+        events.put(('trace', None, trace_events, list(thread_names.items())))
+
+
+def _initial_snapshot(session_id):
+    """Snapshot of a session that has not reported yet, shaped like ChromeSession.snapshot()"""
+    lifecycle = SessionLifecycle(session_id).snapshot()
+    return {
+        'session_id': session_id,
+        'state': lifecycle['state'],
+        'lifecycle': lifecycle,
+        'is_running': False,
+        'is_paused': False,
+        'sent_count': 0,
+        'stats': SessionStats(window=1).snapshot(),
+        'perf': {},
+        'recycles': 0,
+        'network': {'blocked_requests': 0, 'blocked_by_type': {}, 'bytes_saved_estimate': 0, 'bytes_allowed': 0,
+                    'downloads_seen': 0},
+        'last_recycle': None,
+        'resume_latency': None,
+    }
+
+
+class RemoteSession:
+    """Coordinator-side stand-in for a ChromeSession running in a worker process"""
+
+    def __init__(self, pool, session_id, user_data_dir, friends_list, start_time=None):
+        self.pool = pool
+        self.session_id = session_id
+        self.user_data_dir = user_data_dir
+        self.friends_list = friends_list
+        self.start_time = start_time
+        self.thread = None
+        self.is_running = False
+        # Same shape as a local session's snapshot until the worker reports
+        self.latest = _initial_snapshot(session_id)
+        self.lock = threading.Lock()
+
+    @property
+    def sent_count(self):
+        return self.snapshot()['sent_count']
+
+    def start(self, wait_for=None):
+        # The worker itself waits for a previous session on the same profile
+        if self.is_running:
+            return
+        self.is_running = True
+        self.pool.send(self.session_id, ('start', self.session_id, self.user_data_dir, self.friends_list, self.start_time))
+
+    def stop(self):
+        self.is_running = False
+        self.pool.send(self.session_id, ('stop', self.session_id), spawn=False)
+
+    def pause(self):
+        self.pool.send(self.session_id, ('pause', self.session_id), spawn=False)
+
+    def resume(self):
+        self.pool.send(self.session_id, ('resume', self.session_id), spawn=False)
+
+    def recycle(self, reason='requested'):
+        self.pool.send(self.session_id, ('recycle', self.session_id, reason), spawn=False)
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.latest)
+
+    def _update(self, snapshot):
+        with self.lock:
+            self.latest = snapshot
+        if snapshot['state'] in SessionState.TERMINAL:
+            self.is_running = False
+
+
+class WorkerPool:
+    """Coordinator for sessions running in worker processes, relaying their events to the app"""
+
+    def __init__(self, sessions_per_process, status_callback, event_callback):
+        self.sessions_per_process = max(1, sessions_per_process)
+        self.status_callback = status_callback
+        self.event_callback = event_callback
+        self.context = multiprocessing.get_context('spawn')
+        self.events = self.context.Queue()
+        self.workers = {}
+        self.sessions = {}
+        self.lock = threading.Lock()
+        self.running = True
+        self.thread = threading.Thread(target=self._relay, daemon=True)
+        self.thread.start()
+
+    def create_session(self, session_id, user_data_dir, friends_list, start_time=None):
+        session = RemoteSession(self, session_id, user_data_dir, friends_list, start_time)
+        with self.lock:
+            self.sessions[session_id] = session
+        return session
+
+    def worker_for(self, session_id):
+        # A session always lands on the same worker, so restarts can wait for the old browser there
+        return (session_id - 1) // self.sessions_per_process
+
+    def send(self, session_id, command, spawn=True):
+        worker_id = self.worker_for(session_id)
+        with self.lock:
+            worker = self.workers.get(worker_id)
+            if worker is None or not worker[0].is_alive():
+                if not spawn:
+                    return
+                worker = self._spawn(worker_id)
+        worker[1].put(command)
+
+    def _spawn(self, worker_id):
+        commands = self.context.Queue()
+        process = self.context.Process(target=_worker_main, args=(worker_id, commands, self.events),
+                                       name=f'snapchat-worker-{worker_id}', daemon=True)
+        process.start()
+        self.workers[worker_id] = (process, commands)
+        self.status_callback(0, f"Started worker process {worker_id} (pid {process.pid})")
+        return self.workers[worker_id]
+
+    def _relay(self):
+        next_check = time.monotonic() + WORKER_CHECK_SECONDS
+        while self.running:
+            # Liveness is checked on a timer: the queue is rarely quiet while sessions are busy
+            if time.monotonic() >= next_check:
+                self._check_workers()
+                next_check = time.monotonic() + WORKER_CHECK_SECONDS
+            try:
+                message = self.events.get(timeout=max(0.0, next_check - time.monotonic()))
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                break
+            kind, session_id = message[0], message[1]
+            if kind == 'status':
+                self.status_callback(session_id, message[2])
+            elif kind == 'event':
+                self.event_callback(session_id, *message[2:])
+            elif kind == 'snapshot':
+                session = self.sessions.get(session_id)
+                if session is not None:
+                    session._update(message[2])
+            elif kind == 'trace' and TRACER:
+                TRACER.extend(message[2], dict(message[3]))
+
+    def _check_workers(self):
+        """Mark the sessions of a crashed worker as dead; other workers are unaffected"""
+        with self.lock:
+            dead = [(worker_id, process) for worker_id, (process, _) in self.workers.items()
+                    if not process.is_alive()]
+            for worker_id, _ in dead:
+                del self.workers[worker_id]
+            sessions = list(self.sessions.values())
+        for worker_id, process in dead:
+            self.status_callback(0, f"Worker process {worker_id} exited (code {process.exitcode})")
+            for session in sessions:
+                if self.worker_for(session.session_id) != worker_id:
+                    continue
+                snapshot = session.snapshot()
+                if snapshot['state'] in SessionState.TERMINAL:
+                    continue
+                old_state = snapshot['state']
+                snapshot['state'] = SessionState.DEAD
+                snapshot['lifecycle'] = dict(snapshot['lifecycle'], state=SessionState.DEAD, state_seconds=0)
+                session._update(snapshot)
+                self.event_callback(session.session_id, 'state', f"State {old_state} -> dead (worker exited)",
+                                    {'from': old_state, 'to': SessionState.DEAD, 'reason': 'worker exited',
+                                     'time': time.time()})
+
+    def shutdown(self, timeout=20):
+        """Stop every worker, giving them time to close their browsers"""
+        with self.lock:
+            workers = list(self.workers.values())
+        for _, commands in workers:
+            commands.put(('shutdown', None))
+        deadline = time.time() + timeout
+        for process, _ in workers:
+            process.join(max(0.1, deadline - time.time()))
+            if process.is_alive():
+                process.terminate()
+        self.running = False
+
+
+def _dashboard_row(snapshot):
+    """Dashboard table values for one session snapshot"""
+    stats = snapshot['stats']
+    errors = sum(stats['errors'].values())
+    success = f"{stats['successes'] * 100 / stats['rounds']:.0f}%" if stats['rounds'] else ''
+    last_error = ''
+    if stats['last_error']:
+        age = _format_duration(time.time() - stats['last_error_time'])
+        last_error = f"{age} ago: {stats['last_error'].splitlines()[0][:80]}"
+    processes = snapshot.get('processes')
+    cpu = memory = fds = ''
+    if processes:
+        cpu = f"{processes['cpu_percent']:.0f}" if processes['cpu_percent'] is not None else ''
+        memory_bytes = processes['pss_bytes'] if processes['pss_bytes'] is not None else processes['rss_bytes']
+        memory = f"{memory_bytes / (1024 * 1024):.0f}"
+        fds = processes['open_fds']
+    return [
+        snapshot['session_id'],
+        snapshot['state'],
+        _format_duration(snapshot['lifecycle']['state_seconds']),
+        snapshot['sent_count'],
+        stats['rounds'],
+        f"{stats['rounds_per_minute']:.1f}",
+        success,
+        errors,
+        cpu,
+        memory,
+        fds,
+        last_error,
+    ]
+
+
+def _dashboard_sort_key(column, snapshot):
+    """Sort key for a dashboard column (numbers compare as numbers)"""
+    stats = snapshot['stats']
+    if column == 'state':
+        return snapshot['state']
+    if column == 'in_state':
+        return snapshot['lifecycle']['state_seconds']
+    if column == 'photos':
+        return snapshot['sent_count']
+    if column == 'rounds':
+        return stats['rounds']
+    if column == 'rate':
+        return stats['rounds_per_minute']
+    if column == 'success':
+        return stats['successes'] / stats['rounds'] if stats['rounds'] else -1
+    if column == 'errors':
+        return sum(stats['errors'].values())
+    processes = snapshot.get('processes') or {}
+    if column == 'cpu':
+        return processes.get('cpu_percent') or 0
+    if column == 'memory':
+        return processes.get('pss_bytes') or processes.get('rss_bytes') or 0
+    if column == 'fds':
+        return processes.get('open_fds') or 0
+    if column == 'last_error':
+        return stats['last_error_time'] or 0
+    return snapshot['session_id']
+
+
 class SnapchatAutomationApp:
     def __init__(self, root):
         self.root = root
         self.root.title("Snapchat Automation")
-        self.root.geometry("800x700")
+        self.root.geometry("960x760")
         self.root.configure(bg='#0b0b0b')
         
         self.sessions = {}
         self.friends_list = []
+        # session_id -> dashboard row id
         self.session_widgets = {}
+        self.sort_column = 'session'
+        self.sort_descending = False
+        # Status lines from any thread, written to the panel in batches on the Tk thread
+        self.status_queue = queue.Queue()
         self.base_user_data_dir = os.path.join(os.getcwd(), 'chrome_profiles')
         self.start_time = None
         self.timer_running = False
-        
+        # Photos sent by sessions retired from a running fleet, kept in the fleet total
+        self.retired_sent_count = 0
+        # Threads of stopped sessions, so a relaunch waits for their profiles to be released
+        self.previous_threads = {}
+        # (action, session_id) requests from other threads, executed on the Tk thread
+        self.control_queue = queue.Queue()
+        self.metrics_server = None
+        self.worker_pool = None
+        self.event_log = None
+        # session_id -> latest browser process tree usage, written by the process monitor thread
+        self.process_usage = {}
+        self.process_monitor_stop = threading.Event()
+        if EVENT_LOG_ENABLED:
+            self.event_log = EventLog()
+            self.event_log.start()
+
         # Create profiles directory
         os.makedirs(self.base_user_data_dir, exist_ok=True)
-        
+
         self._create_gui()
         self._load_friends()
-        
+        if SESSIONS_PER_PROCESS:
+            self.worker_pool = WorkerPool(SESSIONS_PER_PROCESS, self._update_status, self._log_event)
+        if BLOCK_URL_PATTERN_ERROR:
+            self._update_status(0, f"SNAPCHAT_BLOCK_URL_PATTERNS: {BLOCK_URL_PATTERN_ERROR} - network request policy disabled")
+        self._start_metrics_server()
+        self._start_process_monitor()
+        self._process_control_queue()
+        self._flush_status()
+        self._refresh_all_session_displays()
+        self.root.protocol("WM_DELETE_WINDOW", self._on_close)
+
+    def _on_close(self):
+        """Flush the event log and shut down the local server before the window goes away"""
+        self.process_monitor_stop.set()
+        if self.metrics_server:
+            self.metrics_server.stop()
+        if self.worker_pool:
+            # Workers close their browsers off the Tk thread; the window is hidden meanwhile
+            self.root.withdraw()
+            pool, self.worker_pool = self.worker_pool, None
+            shutdown = threading.Thread(target=pool.shutdown, daemon=True)
+            shutdown.start()
+            self._finish_close(shutdown)
+            return
+        self._finish_close()
+
+    def _finish_close(self, shutdown=None):
+        if shutdown is not None and shutdown.is_alive():
+            self.root.after(100, lambda: self._finish_close(shutdown))
+            return
+        self._export_trace()
+        if self.event_log:
+            self.event_log.close()
+        self.root.destroy()
+
+    def _export_trace(self, background=False, wait_for=()):
+        """Write the collected spans to SNAPCHAT_TRACE_FILE, after the given session threads have finished"""
+        if not TRACER:
+            return
+
+        def export():
+            deadline = time.time() + WORKER_SHUTDOWN_SECONDS
+            for thread in wait_for:
+                if thread is not None:
+                    thread.join(max(0, deadline - time.time()))
+            try:
+                TRACER.export(TRACE_FILE)
+                self._update_status(0, f"Trace written to {TRACE_FILE} (open it in ui.perfetto.dev or chrome://tracing)")
+            except OSError as e:
+                self._log_event(0, 'trace', f"Trace export failed - {str(e)}")
+
+        if background:
+            threading.Thread(target=export, daemon=True).start()
+        else:
+            export()
+
+    def _log_event(self, session_id, kind, message, data=None):
+        """Structured event sink passed to sessions"""
+        if self.event_log:
+            self.event_log.log(session_id, message, kind=kind, data=data)
+
+    def _start_metrics_server(self):
+        """Start the optional local HTTP metrics/control endpoint"""
+        if not METRICS_PORT:
+            return
+        try:
+            self.metrics_server = MetricsServer(self, METRICS_HOST, METRICS_PORT)
+            self.metrics_server.start()
+            self._update_status(0, f"Metrics endpoint listening on http://{METRICS_HOST}:{METRICS_PORT}/metrics")
+        except OSError as e:
+            self.metrics_server = None
+            self._update_status(0, f"Metrics endpoint failed to start - {str(e)}")
+
+    def _start_process_monitor(self):
+        """Sample every session's browser process tree on a background thread (Linux only)"""
+        if not PROCESS_SAMPLE_INTERVAL or not ProcessTreeSampler.available():
+            return
+        if PROCESS_LIMIT_ACTION not in ('recycle', 'restart'):
+            self._update_status(0, f"Unknown SNAPCHAT_PROCESS_LIMIT_ACTION '{PROCESS_LIMIT_ACTION}' - process limits disabled")
+        threading.Thread(target=self._monitor_processes, name='process-monitor', daemon=True).start()
+
+    def _monitor_processes(self):
+        sampler = ProcessTreeSampler()
+        limits = ProcessLimitPolicy()
+        act = limits.enabled and PROCESS_LIMIT_ACTION in ('recycle', 'restart')
+        sample_count = 0
+        while not self.process_monitor_stop.wait(PROCESS_SAMPLE_INTERVAL):
+            # Stopping and finished sessions have no browser worth sampling or acting on
+            sessions = {session_id: session for session_id, session in list(self.sessions.items())
+                        if session.snapshot()['state'] not in SessionState.TERMINAL + (SessionState.STOPPING,)}
+            try:
+                started = time.time()
+                usage = sampler.sample({session_id: session.user_data_dir for session_id, session in sessions.items()})
+                _trace_since('process sample', 0, started, sessions=len(usage))
+            except OSError as e:
+                self._update_status(0, f"Process accounting stopped - {str(e)}")
+                return
+            self.process_usage = usage
+            sample_count += 1
+            for session_id, session_usage in usage.items():
+                if sample_count % PROCESS_LOG_EVERY == 0:
+                    self._log_event(session_id, 'process', _format_process_usage(session_usage), session_usage)
+                reason = limits.reason(session_id, session_usage) if act else None
+                if reason is None or session_id not in sessions:
+                    continue
+                self._update_status(session_id, f"Session {session_id}: Process limit exceeded ({reason}) - "
+                                                 f"{'recycling page' if PROCESS_LIMIT_ACTION == 'recycle' else 'restarting browser'}")
+                if PROCESS_LIMIT_ACTION == 'recycle':
+                    sessions[session_id].recycle(f"process limit: {reason}")
+                else:
+                    self.control_queue.put(('restart', session_id))
+
+    def _fleet_snapshot(self):
+        """Collect one consistent view of every session (safe to call from any thread)"""
+        working_seconds = time.time() - self.start_time if self.start_time is not None else None
+        sessions = []
+        for session_id, session in sorted(list(self.sessions.items())):
+            session_snapshot = session.snapshot()
+            session_snapshot['processes'] = self.process_usage.get(session_id)
+            sessions.append(session_snapshot)
+        return {
+            'timestamp': time.time(),
+            'working_seconds': working_seconds,
+            'sessions': sessions,
+        }
+
+    def _process_control_queue(self):
+        """Run session control requests queued by other threads"""
+        try:
+            while True:
+                try:
+                    action, session_id = self.control_queue.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    self._control_session(action, session_id)
+                except Exception as e:
+                    self._update_status(session_id, f"Session {session_id}: {action} failed - {str(e)}")
+        finally:
+            self.root.after(200, self._process_control_queue)
+
+    def _control_session(self, action, session_id):
+        session = self.sessions.get(session_id)
+        if session is None:
+            return
+        if action != 'restart' and session.snapshot()['state'] in SessionState.TERMINAL:
+            # Nothing left to pause or stop; restart relaunches it
+            return
+        if action == 'pause':
+            session.pause()
+        elif action == 'resume':
+            session.resume()
+        elif action == 'stop':
+            session.stop()
+            self.previous_threads[session_id] = session.thread
+            self._update_status(session_id, "Stop requested")
+        elif action == 'recycle':
+            session.recycle()
+        elif action == 'restart':
+            session.stop()
+            # The replacement starts counting from zero; keep the old count in the fleet total
+            self.retired_sent_count += session.sent_count
+            replacement = self._create_session(session_id, session.user_data_dir)
+            self.sessions[session_id] = replacement
+            replacement.start(wait_for=session.thread)
+            self._update_status(session_id, "Restarting (browser will relaunch, login may be required)")
+
+    def _selected_session_ids(self):
+        rows = set(self.session_tree.selection())
+        return [session_id for session_id, row in self.session_widgets.items() if row in rows]
+
+    def _control_selected(self, action):
+        """Apply a control action to the sessions selected in the dashboard"""
+        session_ids = self._selected_session_ids()
+        if not session_ids:
+            self._update_status(0, "Select one or more sessions in the table first.")
+            return
+        for session_id in session_ids:
+            self._control_session(action, session_id)
+
+    def _show_session_menu(self, event):
+        row = self.session_tree.identify_row(event.y)
+        if not row:
+            return
+        if row not in self.session_tree.selection():
+            self.session_tree.selection_set(row)
+        self.session_menu.tk_popup(event.x_root, event.y_root)
+
     def _create_gui(self):
         # Session count slider and launch button on same row
         slider_frame = tk.Frame(self.root, bg='#0b0b0b')
         slider_frame.pack(pady=10)
         
-        tk.Label(slider_frame, text="Sessions (1-10):", font=('Arial', 12), 
+        tk.Label(slider_frame, text=f"Sessions (1-{MAX_SESSIONS}):", font=('Arial', 12),
                 bg='#0b0b0b', fg='white').pack(side=tk.LEFT, padx=10)
         
         self.session_var = tk.IntVar(value=1)
-        self.session_slider = tk.Scale(slider_frame, from_=1, to=10, orient=tk.HORIZONTAL,
+        self.session_slider = tk.Scale(slider_frame, from_=1, to=MAX_SESSIONS, orient=tk.HORIZONTAL,
                                        variable=self.session_var, bg='#1a1a1a', fg='white',
                                        highlightbackground='#0b0b0b', length=200)
         self.session_slider.pack(side=tk.LEFT, padx=10)
@@ -709,11 +2957,52 @@ class SnapchatAutomationApp:
         # Session list display
         session_list_frame = tk.LabelFrame(self.root, text="Sessions", font=('Arial', 12),
                                            bg='#1a1a1a', fg='white', padx=10, pady=10)
-        session_list_frame.pack(pady=10, padx=20, fill=tk.BOTH, expand=False)
-        
-        # Container for session items with flex layout
-        self.session_container = tk.Frame(session_list_frame, bg='#1a1a1a')
-        self.session_container.pack(fill=tk.BOTH, expand=True)
+        session_list_frame.pack(pady=10, padx=20, fill=tk.BOTH, expand=True)
+
+        # Filter row
+        filter_frame = tk.Frame(session_list_frame, bg='#1a1a1a')
+        filter_frame.pack(fill=tk.X, pady=(0, 5))
+        tk.Label(filter_frame, text="Show:", font=('Arial', 9), bg='#1a1a1a', fg='white').pack(side=tk.LEFT)
+        self.filter_var = tk.StringVar(value=DASHBOARD_FILTER_ALL)
+        filter_choices = [DASHBOARD_FILTER_ALL, DASHBOARD_FILTER_ERRORS] + [
+            state for state in STATE_COLORS if state != SessionState.CREATED]
+        filter_box = ttk.Combobox(filter_frame, textvariable=self.filter_var, values=filter_choices,
+                                  state='readonly', width=16)
+        filter_box.pack(side=tk.LEFT, padx=5)
+        filter_box.bind('<<ComboboxSelected>>', lambda e: self._refresh_all_session_displays(reschedule=False))
+        self.fleet_summary_label = tk.Label(filter_frame, text="", font=('Arial', 9), bg='#1a1a1a', fg='#aaaaaa')
+        self.fleet_summary_label.pack(side=tk.RIGHT)
+
+        # Controls for the selected rows; the browser and login are kept on pause
+        controls_frame = tk.Frame(session_list_frame, bg='#1a1a1a')
+        controls_frame.pack(fill=tk.X, pady=(0, 5))
+        tk.Label(controls_frame, text="Selected:", font=('Arial', 9), bg='#1a1a1a', fg='white').pack(side=tk.LEFT)
+        self.session_menu = tk.Menu(self.root, tearoff=0)
+        for action, label, color in SESSION_BUTTONS:
+            tk.Button(controls_frame, text=label, font=('Arial', 9), bg=color, fg='white', padx=8, pady=2,
+                      activeforeground='white', command=lambda a=action: self._control_selected(a)
+                      ).pack(side=tk.LEFT, padx=3)
+            self.session_menu.add_command(label=label, command=lambda a=action: self._control_selected(a))
+
+        # One row per session; scales to dozens of sessions
+        style = ttk.Style(self.root)
+        style.configure('Dashboard.Treeview', background='#2a2a2a', fieldbackground='#2a2a2a',
+                        foreground='white', rowheight=20, font=('Consolas', 9))
+        style.configure('Dashboard.Treeview.Heading', font=('Arial', 9, 'bold'))
+        table_frame = tk.Frame(session_list_frame, bg='#1a1a1a')
+        table_frame.pack(fill=tk.BOTH, expand=True)
+        self.session_tree = ttk.Treeview(table_frame, columns=[c[0] for c in DASHBOARD_COLUMNS], show='headings',
+                                         height=10, style='Dashboard.Treeview')
+        for key, heading, width, anchor in DASHBOARD_COLUMNS:
+            self.session_tree.heading(key, text=heading, command=lambda k=key: self._sort_dashboard(k))
+            self.session_tree.column(key, width=width, anchor=anchor, stretch=(key == 'last_error'))
+        for state, color in STATE_COLORS.items():
+            self.session_tree.tag_configure(state, foreground=color)
+        tree_scroll = ttk.Scrollbar(table_frame, orient=tk.VERTICAL, command=self.session_tree.yview)
+        self.session_tree.configure(yscrollcommand=tree_scroll.set)
+        self.session_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.session_tree.bind('<Button-3>', self._show_session_menu)
+        tree_scroll.pack(side=tk.RIGHT, fill=tk.Y)
         
         # Hidden friends listbox for internal use
         self.friends_listbox = tk.Listbox(self.root, font=('Arial', 10), bg='#2a2a2a',
@@ -725,7 +3014,7 @@ class SnapchatAutomationApp:
                                      bg='#1a1a1a', fg='white', padx=10, pady=10)
         status_frame.pack(pady=10, padx=20, fill=tk.BOTH, expand=True)
         
-        self.status_text = scrolledtext.ScrolledText(status_frame, height=15, font=('Consolas', 9),
+        self.status_text = scrolledtext.ScrolledText(status_frame, height=10, font=('Consolas', 9),
                                                      bg='#2a2a2a', fg='white', wrap=tk.WORD)
         self.status_text.pack(fill=tk.BOTH, expand=True)
         
@@ -857,69 +3146,135 @@ class SnapchatAutomationApp:
             return
             
         session_count = self.session_var.get()
-        
-        # Stop existing sessions
-        self._stop_all_sessions()
-        
-        # Clear session display
-        for widget in self.session_container.winfo_children():
-            widget.destroy()
-        self.session_widgets.clear()
-        
+        started = time.time()
+
+        if self._live_session_ids():
+            # Resize the running fleet; the other sessions and the working clock carry on
+            self._scale_sessions(session_count)
+            _trace_since('scale sessions', 0, started, count=session_count)
+            return
+
+        # Clear stopped sessions left from the previous run
+        if self.sessions:
+            self._stop_all_sessions()
+        self._clear_session_rows()
+        self.retired_sent_count = 0
+
         # Start working time timer (set before creating sessions so they can use it)
         self.start_time = time.time()
         self.timer_running = True
         
         # Launch new sessions
         for i in range(1, session_count + 1):
-            user_data_dir = os.path.join(self.base_user_data_dir, f'session_{i}')
-            session = ChromeSession(i, user_data_dir, self.friends_list.copy(), self._update_status, self.start_time)
-            self.sessions[i] = session
-            session.start()
-            # Create session display widget
-            self._create_session_widget(i)
-        
-        self.launch_btn.config(state=tk.DISABLED)
+            self._add_session(i)
+        
+        self.launch_btn.config(text="Apply Session Count")
         self.stop_btn.config(state=tk.NORMAL)
         self._update_status(0, f"Launched {session_count} session(s). Each will open Chrome - please login manually.")
+        _trace_since('launch sessions', 0, started, count=session_count)
         
         # Start working time display update
         self._update_working_time()
-    
+
+    def _live_session_ids(self):
+        """Sessions that are running or starting up (not stopping or ended)"""
+        return sorted(session_id for session_id, session in self.sessions.items()
+                      if session.snapshot()['state'] not in SessionState.TERMINAL + (SessionState.STOPPING,))
+
+    def _scale_sessions(self, target):
+        """Add or retire sessions until `target` are live"""
+        live = self._live_session_ids()
+        if target > len(live):
+            # Fill the lowest free ids, so each new session gets the next unused profile directory
+            added = []
+            session_id = 0
+            while len(live) + len(added) < target:
+                session_id += 1
+                if session_id not in live:
+                    self._add_session(session_id)
+                    added.append(session_id)
+            self._update_status(0, f"Added {len(added)} session(s) ({', '.join(map(str, added))}); "
+                                   f"{target} running. Please login in the new windows.")
+        elif target < len(live):
+            # Retire the highest ids so the remaining profiles stay 1..N
+            retired = live[target:]
+            for session_id in retired:
+                self._retire_session(session_id)
+            self._update_status(0, f"Retired {len(retired)} session(s) ({', '.join(map(str, retired))}); {target} running.")
+        else:
+            self._update_status(0, f"{target} session(s) already running.")
+
+    def _add_session(self, session_id):
+        """Start a session on profile session_<id>, replacing an ended session with that id"""
+        user_data_dir = os.path.join(self.base_user_data_dir, f'session_{session_id}')
+        previous = self.sessions.get(session_id)
+        if previous is not None:
+            self.previous_threads[session_id] = previous.thread
+            self.retired_sent_count += previous.sent_count
+        session = self._create_session(session_id, user_data_dir)
+        self.sessions[session_id] = session
+        session.start(wait_for=self.previous_threads.pop(session_id, None))
+        if session_id not in self.session_widgets:
+            self._create_session_widget(session_id)
+
+    def _retire_session(self, session_id):
+        """Stop one session and drop it from the dashboard, keeping its photos in the fleet total"""
+        session = self.sessions.pop(session_id)
+        session.stop()
+        self.previous_threads[session_id] = session.thread
+        self.retired_sent_count += session.sent_count
+        row = self.session_widgets.pop(session_id, None)
+        if row is not None:
+            self.session_tree.delete(row)
+
+    def _create_session(self, session_id, user_data_dir):
+        """Create a session in this process, or a proxy for one in a worker process"""
+        if self.worker_pool:
+            return self.worker_pool.create_session(session_id, user_data_dir, self.friends_list.copy(), self.start_time)
+        return ChromeSession(session_id, user_data_dir, self.friends_list.copy(), self._update_status,
+                             self.start_time, self._log_event)
+
     def _create_session_widget(self, session_id):
-        """Create a widget for displaying session info with sent photo count"""
-        session_frame = tk.Frame(self.session_container, bg='#2a2a2a', relief=tk.RAISED, bd=2)
-        session_frame.pack(side=tk.LEFT, padx=5, pady=5, fill=tk.BOTH, expand=True)
-        
-        session_label = tk.Label(session_frame, text=f"Session {session_id}", 
-                                 font=('Arial', 10, 'bold'), bg='#2a2a2a', fg='white')
-        session_label.pack(pady=5)
-        
-        count_label = tk.Label(session_frame, text="Photos: 0", 
-                              font=('Arial', 9), bg='#2a2a2a', fg='#31d158')
-        count_label.pack(pady=2)
-        
-        self.session_widgets[session_id] = {
-            'frame': session_frame,
-            'count_label': count_label
-        }
-    
-    def _update_session_display(self, session_id):
-        """Update the session display with current sent count"""
-        if session_id in self.sessions and session_id in self.session_widgets:
-            session = self.sessions[session_id]
-            count = session.sent_count if hasattr(session, 'sent_count') else 0
-            self.session_widgets[session_id]['count_label'].config(text=f"Photos: {count}")
-        
+        """Add a dashboard row for a session"""
+        values = [session_id, SessionState.CREATED, '', 0, 0, '', '', 0, '', '', '', '']
+        self.session_widgets[session_id] = self.session_tree.insert('', tk.END, values=values,
+                                                                    tags=(SessionState.CREATED,))
+
+    def _clear_session_rows(self):
+        for row in self.session_widgets.values():
+            self.session_tree.delete(row)
+        self.session_widgets.clear()
+
+    def _sort_dashboard(self, column):
+        if self.sort_column == column:
+            self.sort_descending = not self.sort_descending
+        else:
+            self.sort_column = column
+            self.sort_descending = False
+        self._refresh_all_session_displays(reschedule=False)
+
+    def _dashboard_visible(self, snapshot):
+        selected = self.filter_var.get()
+        if selected == DASHBOARD_FILTER_ALL:
+            return True
+        if selected == DASHBOARD_FILTER_ERRORS:
+            return bool(snapshot['stats']['errors'])
+        return snapshot['state'] == selected
+
     def _stop_all_sessions(self):
-        for session in self.sessions.values():
+        started = time.time()
+        had_sessions = bool(self.sessions)
+        for session_id, session in self.sessions.items():
             session.stop()
+            self.previous_threads[session_id] = session.thread
         self.sessions.clear()
+        _trace_since('stop all sessions', 0, started)
+        if had_sessions:
+            # Sessions close their browsers on their own threads; export once those have finished
+            self._export_trace(background=True, wait_for=list(self.previous_threads.values()))
         # Clear session display
-        for widget in self.session_container.winfo_children():
-            widget.destroy()
-        self.session_widgets.clear()
-        self.launch_btn.config(state=tk.NORMAL)
+        self._clear_session_rows()
+        self.launch_btn.config(text="Launch Sessions")
         self.stop_btn.config(state=tk.DISABLED)
         self._update_status(0, "All sessions stopped.")
         
@@ -929,6 +3284,8 @@ class SnapchatAutomationApp:
         self.working_time_label.config(text="")
         
     def _update_status(self, session_id, message):
+        if self.event_log:
+            self.event_log.log(session_id, message, kind='round' if '[ROUND ' in message else 'status')
         # Check if message already has timestamp format [HH:MM:SS] or [HH:MM]
         if message.startswith('[') and ']' in message:
             # Extract timestamp part and message part
@@ -957,24 +3314,65 @@ class SnapchatAutomationApp:
                 status_msg = f"[{time_str}] Session {session_id} {message}\n"
             else:
                 status_msg = f"[{time_str}] {message}\n"
-        self.status_text.insert(tk.END, status_msg)
-        
-        # Limit to last 30 messages
-        lines = self.status_text.get("1.0", tk.END).split('\n')
-        if len(lines) > 31:  # 30 messages + 1 empty line at end
-            # Keep only the last 30 lines
-            self.status_text.delete("1.0", f"{len(lines) - 30}.0")
-        
-        self.status_text.see(tk.END)
-        # Update session display for active sessions
-        if session_id > 0:
-            self._update_session_display(session_id)
-        self.root.update_idletasks()
-    
-    def _refresh_all_session_displays(self):
-        """Refresh all session displays"""
-        for session_id in self.sessions.keys():
-            self._update_session_display(session_id)
+        # Safe from any thread: the Tk widgets are only touched in _flush_status
+        self.status_queue.put(status_msg)
+
+    def _flush_status(self):
+        """Write queued status lines to the panel in one batch"""
+        lines = []
+        try:
+            while True:
+                try:
+                    lines.append(self.status_queue.get_nowait())
+                except queue.Empty:
+                    break
+            if lines:
+                # Only the newest lines survive the trim, so skip inserting the rest
+                self.status_text.insert(tk.END, ''.join(lines[-STATUS_MAX_LINES:]))
+                # Limit to last 30 messages
+                line_count = int(self.status_text.index('end-1c').split('.')[0])
+                if line_count > STATUS_MAX_LINES + 1:  # 30 messages + 1 empty line at end
+                    self.status_text.delete("1.0", f"{line_count - STATUS_MAX_LINES}.0")
+                self.status_text.see(tk.END)
+        finally:
+            self.root.after(STATUS_FLUSH_MS, self._flush_status)
+
+    def _refresh_all_session_displays(self, reschedule=True):
+        """Refresh every dashboard row from one fleet snapshot, applying the filter and sort order"""
+        try:
+            snapshot = self._fleet_snapshot()
+            rows = []
+            for session in snapshot['sessions']:
+                session_id = session['session_id']
+                row = self.session_widgets.get(session_id)
+                if row is None:
+                    continue
+                try:
+                    values = _dashboard_row(session)
+                    self.session_tree.item(row, values=values, tags=(session['state'],))
+                    if self._dashboard_visible(session):
+                        rows.append((_dashboard_sort_key(self.sort_column, session), row))
+                    else:
+                        self.session_tree.detach(row)
+                except Exception as e:
+                    # One bad row must not blank the rest of the dashboard
+                    self._update_status(session_id, f"Session {session_id}: Dashboard update failed - {str(e)}")
+            rows.sort(key=lambda item: item[0], reverse=self.sort_descending)
+            for index, (_, row) in enumerate(rows):
+                self.session_tree.move(row, '', index)
+
+            states = {}
+            for session in snapshot['sessions']:
+                states[session['state']] = states.get(session['state'], 0) + 1
+            rate = sum(session['stats']['rounds_per_minute'] for session in snapshot['sessions'])
+            sent = sum(session['sent_count'] for session in snapshot['sessions']) + self.retired_sent_count
+            summary = ', '.join(f"{count} {state}" for state, count in sorted(states.items()))
+            self.fleet_summary_label.config(
+                text=f"{summary}  |  {rate:.1f} rounds/min  |  {sent} photos" if summary else "")
+        finally:
+            if reschedule:
+                self.root.after(DASHBOARD_REFRESH_MS, self._refresh_all_session_displays)
+
     
     def _update_working_time(self):
         """Update the working time display"""
@@ -999,6 +3397,7 @@ class SnapchatAutomationApp:
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     root = tk.Tk()
     app = SnapchatAutomationApp(root)
     root.mainloop()